@@ -17,21 +17,278 @@ import os
 import glob
 import struct
 import fcntl
+import select
+import re
 
 VERSION = "2.0.0-python"
 
 def print_bar(pos: int, length: int) -> str:
     """Crée une barre de progression ASCII"""
-    bar = "["
-    for i in range(length):
-        if i == pos:
-            bar += "#"
+    if not 0 <= pos < length:
+        return "[" + " " * max(length, 0) + "]"
+    return "[" + " " * pos + "#" + " " * (length - pos - 1) + "]"
+
+# Base de mappings SDL (gamecontrollerdb.txt)
+GAMECONTROLLERDB_NAME = "gamecontrollerdb.txt"
+GAMECONTROLLERDB_CACHE_VERSION = 1
+
+CONTROLLER_AXES = ("leftx", "lefty", "rightx", "righty", "lefttrigger", "righttrigger")
+CONTROLLER_BUTTONS = (
+    "a", "b", "x", "y", "back", "guide", "start", "leftstick", "rightstick",
+    "leftshoulder", "rightshoulder", "dpup", "dpdown", "dpleft", "dpright",
+    "misc1", "paddle1", "paddle2", "paddle3", "paddle4", "touchpad",
+)
+CONTROLLER_TRIGGERS = (CONTROLLER_AXES.index("lefttrigger"), CONTROLLER_AXES.index("righttrigger"))
+
+MAPPING_SOURCE_BUTTON = 0
+MAPPING_SOURCE_AXIS = 1
+MAPPING_SOURCE_HAT = 2
+
+_gamecontroller_db_cache = {}
+
+def hat_to_sdl(x: int, y: int) -> int:
+    """Convertit une position de hat pygame en masque SDL"""
+    hat_value = 0
+    if y == 1: hat_value |= 1   # UP
+    if x == 1: hat_value |= 2   # RIGHT
+    if y == -1: hat_value |= 4  # DOWN
+    if x == -1: hat_value |= 8  # LEFT
+    return hat_value
+
+def compile_controller_mapping(fields) -> tuple:
+    """Compile les champs 'cible:source' d'un mapping en table de traduction
+
+    Chaque entrée est (cible_axe, index_cible, demi_cible, type_source,
+    index_source, masque_hat, demi_source, inversion).
+    """
+    table = []
+    for target, source in fields:
+        target_half = 0
+        if target[:1] in "+-" and len(target) > 1:
+            target_half = 1 if target[0] == "+" else -1
+            target = target[1:]
+        if target in CONTROLLER_AXES:
+            target_axis, target_index = True, CONTROLLER_AXES.index(target)
+        elif target in CONTROLLER_BUTTONS:
+            target_axis, target_index = False, CONTROLLER_BUTTONS.index(target)
+        else:
+            continue
+
+        source_half = 0
+        if source[:1] in "+-":
+            source_half = 1 if source[0] == "+" else -1
+            source = source[1:]
+        invert = source.endswith("~")
+        source = source.rstrip("~")
+        try:
+            if source.startswith("b"):
+                entry = (MAPPING_SOURCE_BUTTON, int(source[1:]), 0)
+            elif source.startswith("a"):
+                entry = (MAPPING_SOURCE_AXIS, int(source[1:]), 0)
+            elif source.startswith("h"):
+                hat, mask = source[1:].split(".")
+                entry = (MAPPING_SOURCE_HAT, int(hat), int(mask))
+            else:
+                continue
+        except ValueError:
+            continue
+        table.append((target_axis, target_index, target_half) + entry + (source_half, invert))
+    return tuple(table)
+
+def parse_gamecontroller_db(path: str) -> dict:
+    """Construit l'index {(guid, plateforme): (nom, table)} d'un fichier de mappings"""
+    index = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(",")
+            if len(parts) < 3:
+                continue
+            guid, name = parts[0].lower(), parts[1]
+            platform_name = ""
+            fields = []
+            for part in parts[2:]:
+                target, sep, source = part.partition(":")
+                if not sep:
+                    continue
+                if target == "platform":
+                    platform_name = source
+                else:
+                    fields.append((target, source))
+            # Comme SDL, la dernière définition l'emporte
+            index[(guid, platform_name)] = (name, compile_controller_mapping(fields))
+    return index
+
+def cache_file_path(name: str) -> str:
+    """Emplacement d'un fichier de cache dans $XDG_CACHE_HOME/sdl-jstest"""
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_dir, "sdl-jstest", name)
+
+def write_cache_file(cache_path: str, data: bytes):
+    """Écrit un fichier de cache de façon atomique, en ignorant les erreurs"""
+    tmp_path = f"{cache_path}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Le cache est facultatif
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+def gamecontroller_db_cache_path(path: str) -> str:
+    """Emplacement du cache compilé d'un fichier de mappings"""
+    import hashlib
+
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    return cache_file_path(f"gamecontrollerdb-{digest}.pickle")
+
+def find_gamecontroller_db() -> Optional[str]:
+    """Cherche un gamecontrollerdb.txt aux emplacements habituels"""
+    candidates = [
+        os.environ.get("SDL_GAMECONTROLLERCONFIG_FILE"),
+        GAMECONTROLLERDB_NAME,
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), GAMECONTROLLERDB_NAME),
+        os.path.expanduser(os.path.join("~/.config/sdl-jstest", GAMECONTROLLERDB_NAME)),
+    ]
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    return None
+
+def load_gamecontroller_db(path: Optional[str] = None) -> tuple:
+    """Charge l'index des mappings, depuis le cache compilé s'il est à jour
+
+    Retourne (chemin, index); l'index est vide si aucun fichier n'est trouvé.
+    """
+    import pickle
+
+    if path is None:
+        path = find_gamecontroller_db()
+    if path is None:
+        return None, {}
+    if path in _gamecontroller_db_cache:
+        return path, _gamecontroller_db_cache[path]
+
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        print(f"Unable to read {path}: {e}")
+        return None, {}
+    stamp = (GAMECONTROLLERDB_CACHE_VERSION, os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    cache_path = gamecontroller_db_cache_path(path)
+
+    index = None
+    try:
+        with open(cache_path, "rb") as f:
+            cached_stamp, cached_index = pickle.load(f)
+        if cached_stamp == stamp:
+            index = cached_index
+    except (OSError, pickle.PickleError, EOFError, ValueError, TypeError):
+        pass
+
+    if index is None:
+        try:
+            index = parse_gamecontroller_db(path)
+        except OSError as e:
+            print(f"Unable to read {path}: {e}")
+            return None, {}
+        write_cache_file(cache_path, pickle.dumps((stamp, index), protocol=pickle.HIGHEST_PROTOCOL))
+
+    _gamecontroller_db_cache[path] = index
+    return path, index
+
+def sdl_platform_name() -> str:
+    """Nom de la plateforme tel qu'utilisé dans gamecontrollerdb.txt"""
+    import platform
+
+    system = platform.system()
+    return {"Darwin": "Mac OS X"}.get(system, system)
+
+def lookup_controller_mapping(index: dict, guid: str) -> Optional[tuple]:
+    """Cherche le mapping d'un GUID, en ignorant CRC puis version comme SDL"""
+    guid = guid.lower()
+    candidates = [guid]
+    if len(guid) == 32:
+        without_crc = guid[:4] + "0000" + guid[8:]
+        candidates += [without_crc, without_crc[:24] + "0000" + without_crc[28:]]
+    platform_name = sdl_platform_name()
+    for candidate in candidates:
+        for key in ((candidate, platform_name), (candidate, "")):
+            if key in index:
+                return index[key]
+    return None
+
+def sdl_controller_mapping(joy_id: int) -> Optional[tuple]:
+    """Mapping connu de SDL (base intégrée ou SDL_GAMECONTROLLERCONFIG)"""
+    try:
+        from pygame._sdl2 import controller
+
+        controller.init()
+        if not controller.is_controller(joy_id):
+            return None
+        gamecontroller = controller.Controller(joy_id)
+        mapping = gamecontroller.get_mapping()
+        name = controller.name_forindex(joy_id)
+        return name, compile_controller_mapping(mapping.items())
+    except (ImportError, AttributeError, pygame.error):
+        return None
+
+def find_controller_mapping(joy_id: int, joystick, db_path: Optional[str] = None) -> tuple:
+    """Retourne (source, nom, table) du mapping de la manette, ou (None, None, None)"""
+    path, index = load_gamecontroller_db(db_path)
+    mapping = lookup_controller_mapping(index, joystick.get_guid())
+    if mapping is not None:
+        return (path,) + mapping
+    mapping = sdl_controller_mapping(joy_id)
+    if mapping is not None:
+        return ("SDL built-in",) + mapping
+    return None, None, None
+
+def apply_controller_mapping(table: tuple, axes: list, buttons: list, hats: list) -> tuple:
+    """Traduit l'état brut de la manette en axes et boutons du contrôleur"""
+    mapped_axes = [0.0] * len(CONTROLLER_AXES)
+    mapped_buttons = [False] * len(CONTROLLER_BUTTONS)
+
+    for target_axis, target, target_half, kind, index, mask, source_half, invert in table:
+        if kind == MAPPING_SOURCE_BUTTON:
+            if index >= len(buttons):
+                continue
+            value = 1.0 if buttons[index] else 0.0
+        elif kind == MAPPING_SOURCE_AXIS:
+            if index >= len(axes):
+                continue
+            value = -axes[index] if invert else axes[index]
+            if source_half:
+                value = max(0.0, value * source_half)
         else:
-            bar += " "
-    bar += "]"
-    return bar
+            if index >= len(hats):
+                continue
+            value = 1.0 if hat_to_sdl(*hats[index]) & mask else 0.0
+
+        if target_axis:
+            if target_half:
+                if value > 0.5:
+                    mapped_axes[target] = float(target_half)
+            elif target in CONTROLLER_TRIGGERS and kind == MAPPING_SOURCE_AXIS and not source_half:
+                # Gâchette sur un axe complet : -1..1 devient 0..1
+                mapped_axes[target] = (value + 1.0) / 2.0
+            else:
+                mapped_axes[target] = value
+        else:
+            if kind == MAPPING_SOURCE_AXIS and not source_half:
+                pressed = value > 0.0
+            else:
+                pressed = value > 0.5
+            mapped_buttons[target] = mapped_buttons[target] or pressed
+    return mapped_axes, mapped_buttons
 
-def print_joystick_info(joy_id: int, joystick: pygame.joystick.Joystick):
+def print_joystick_info(joy_id: int, joystick: pygame.joystick.Joystick, db_path: Optional[str] = None):
     """Affiche les informations détaillées d'une manette"""
     print(f"Joystick Name:     '{joystick.get_name()}'")
     print(f"Joystick GUID:     {joystick.get_guid()}")
@@ -42,16 +299,18 @@ def print_joystick_info(joy_id: int, joystick: pygame.joystick.Joystick):
     print(f"Number of Balls:   {joystick.get_numballs():2d}")
     
     # Vérifier si c'est un contrôleur de jeu
-    is_gamecontroller = pygame.joystick.get_count() > joy_id
+    source, name, table = find_controller_mapping(joy_id, joystick, db_path)
     print("GameControllerConfig:")
-    if not is_gamecontroller:
+    if source is None:
         print("  missing (see gamecontroller mapping)")
     else:
-        print(f"  Name:    '{joystick.get_name()}'")
+        print(f"  Name:    '{name}'")
         print(f"  GUID:    '{joystick.get_guid()}'")
+        print(f"  Source:  {source}")
+        print(f"  Mapped:  {len(table)} inputs")
     print()
 
-def list_joysticks():
+def list_joysticks(db_path: Optional[str] = None):
     """Liste toutes les manettes disponibles"""
     pygame.init()
     pygame.joystick.init()
@@ -65,12 +324,461 @@ def list_joysticks():
             try:
                 joystick = pygame.joystick.Joystick(joy_id)
                 joystick.init()
-                print_joystick_info(joy_id, joystick)
+                print_joystick_info(joy_id, joystick, db_path)
                 joystick.quit()
             except pygame.error as e:
                 print(f"Unable to open joystick {joy_id}: {e}")
 
-def test_joystick(joy_id: int):
+REDRAW_INTERVAL = 1.0 / 30  # Cadence maximale d'affichage
+
+WAKE_INPUT = "input"
+WAKE_KEY = "key"
+WAKE_RESIZE = "resize"
+UNPLUGGED_WAIT = 1.0  # Délai d'attente maximal (s) une fois le device débranché
+
+class InputWaiter:
+    """Attend avec epoll une entrée sur les devices evdev, stdin ou un redimensionnement
+
+    Les devices sont ouverts en lecture seule à côté de SDL : chaque client evdev
+    reçoit sa propre copie des événements, qui sont simplement vidés ici.
+    """
+
+    def __init__(self, device_paths: list, watch_stdin: bool = False, watch_resize: bool = False):
+        import signal
+
+        self._signal = signal
+        self.epoll = select.epoll()
+        self.kinds = {}
+        self.device_fds = []
+        self.wake_pipe = None
+        self.old_wakeup_fd = None
+        self.old_winch = None
+
+        try:
+            for path in device_paths:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+                self.device_fds.append(fd)
+                self.epoll.register(fd, select.EPOLLIN)
+                self.kinds[fd] = WAKE_INPUT
+
+            if watch_stdin:
+                fd = sys.stdin.fileno()
+                self.epoll.register(fd, select.EPOLLIN)
+                self.kinds[fd] = WAKE_KEY
+
+            if watch_resize:
+                # SIGWINCH réveille epoll via le wakeup fd du module signal
+                read_fd, write_fd = os.pipe()
+                self.wake_pipe = (read_fd, write_fd)
+                os.set_blocking(read_fd, False)
+                os.set_blocking(write_fd, False)
+                self.old_winch = signal.signal(signal.SIGWINCH, lambda signum, frame: None)
+                self.old_wakeup_fd = signal.set_wakeup_fd(write_fd)
+                self.epoll.register(read_fd, select.EPOLLIN)
+                self.kinds[read_fd] = WAKE_RESIZE
+        except Exception:
+            # Ne pas laisser de fd ouvert ni de handler SIGWINCH remplacé
+            self.close()
+            raise
+
+    @staticmethod
+    def _drain(fd: int) -> bytes:
+        data = b""
+        try:
+            while True:
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    break
+                data += chunk
+        except BlockingIOError:
+            pass
+        return data
+
+    def wait(self, timeout: Optional[float] = None) -> set:
+        """Bloque jusqu'à une entrée ou l'expiration du délai, retourne les types réveillés
+
+        Sans device surveillé (débranché), l'attente est bornée à UNPLUGGED_WAIT
+        pour que les rebranchements signalés par SDL soient encore vus.
+        """
+        woken = set()
+        if not self.device_fds:
+            timeout = UNPLUGGED_WAIT if timeout is None else min(timeout, UNPLUGGED_WAIT)
+        try:
+            ready = self.epoll.poll(-1 if timeout is None else timeout)
+        except InterruptedError:
+            return woken
+        for fd, _ in ready:
+            kind = self.kinds.get(fd)
+            if kind == WAKE_INPUT:
+                try:
+                    self._drain(fd)
+                except OSError:
+                    # Device débranché : on ne le surveille plus
+                    self.epoll.unregister(fd)
+                    del self.kinds[fd]
+                    self.device_fds.remove(fd)
+                    os.close(fd)
+                    continue
+            elif kind == WAKE_RESIZE:
+                if self._signal.SIGWINCH not in self._drain(fd):
+                    continue
+            woken.add(kind)
+        return woken
+
+    def close(self):
+        """Libère les fds et restaure SIGWINCH, y compris sur un objet partiellement construit"""
+        if self.old_wakeup_fd is not None:
+            self._signal.set_wakeup_fd(self.old_wakeup_fd)
+        if self.old_winch is not None:
+            self._signal.signal(self._signal.SIGWINCH, self.old_winch)
+        if self.wake_pipe is not None:
+            for fd in self.wake_pipe:
+                os.close(fd)
+        for fd in self.device_fds:
+            os.close(fd)
+        self.epoll.close()
+
+def open_input_waiter(joystick, watch_stdin: bool = False, watch_resize: bool = False) -> Optional[InputWaiter]:
+    """Prépare l'attente sur le device evdev de la manette, None si impossible"""
+    device_path = find_evdev_device(joystick)
+    if not device_path:
+        print("Could not find evdev device for this joystick, using polling loop")
+        return None
+    try:
+        return InputWaiter([device_path], watch_stdin, watch_resize)
+    except OSError as e:
+        print(f"Unable to watch {device_path}: {e}, using polling loop")
+        return None
+
+class LoopStats:
+    """Compte les réveils de la boucle et le temps CPU consommé"""
+
+    def __init__(self):
+        self.wakeups = 0
+        self.start = time.monotonic()
+        self.start_cpu = time.process_time()
+
+    def wakeup(self):
+        self.wakeups += 1
+
+    def report(self, mode: str):
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        cpu = time.process_time() - self.start_cpu
+        print(f"Loop ({mode}): {self.wakeups} wakeups in {elapsed:.1f} s ({self.wakeups / elapsed:.1f}/s), "
+              f"CPU: {cpu:.2f} s ({100.0 * cpu / elapsed:.1f} %)")
+
+# Historique des axes : pour chaque palier, un tampon circulaire numpy de
+# buckets min/max. Afficher 60 s coûte autant qu'afficher 1 s.
+HISTORY_TIERS = ((1.0, 100), (10.0, 100), (60.0, 120))  # (fenêtre en s, buckets)
+HISTORY_ROWS = 4
+HISTORY_DEFAULT_TIER = 1
+
+class AxisHistory:
+    """Historique min/max des axes, décimé en plusieurs paliers de résolution"""
+
+    def __init__(self, num_axes: int):
+        import numpy as np
+
+        self.np = np
+        self.lock = threading.Lock()
+        self.num_axes = num_axes
+        self.current = np.zeros(num_axes, dtype=np.float32)
+        self.tiers = []
+        for window, buckets in HISTORY_TIERS:
+            shape = (num_axes, buckets)
+            self.tiers.append((window / buckets, buckets,
+                               np.full(shape, -1, dtype=np.int64),      # numéro de bucket
+                               np.zeros(shape, dtype=np.float32),       # min
+                               np.zeros(shape, dtype=np.float32),       # max
+                               np.zeros(shape, dtype=np.float32),       # dernière valeur
+                               np.zeros(shape, dtype=np.float32)))      # valeur avant le bucket
+
+    def add(self, axis: int, t: float, value: float):
+        """Ajoute un échantillon (t en secondes, horloge time.time())"""
+        if not 0 <= axis < self.num_axes:
+            return
+        with self.lock:
+            previous = self.current[axis]
+            self.current[axis] = value
+            for duration, buckets, ids, mins, maxs, lasts, opens in self.tiers:
+                bucket = int(t / duration)
+                slot = bucket % buckets
+                if ids[axis, slot] != bucket:
+                    ids[axis, slot] = bucket
+                    mins[axis, slot] = maxs[axis, slot] = value
+                    opens[axis, slot] = previous
+                else:
+                    mins[axis, slot] = min(mins[axis, slot], value)
+                    maxs[axis, slot] = max(maxs[axis, slot], value)
+                lasts[axis, slot] = value
+
+    def window(self, tier: int, now: float, columns: int) -> tuple:
+        """Retourne (min, max) par axe sur la fenêtre du palier, réduits à columns colonnes"""
+        np = self.np
+        duration, buckets, ids, mins, maxs, lasts, opens = self.tiers[tier]
+        current = int(now / duration)
+        expected = np.arange(current - buckets + 1, current + 1)
+        slots = expected % buckets
+        with self.lock:
+            # Un axe immobile garde sa valeur : le bucket courant est renseigné
+            slot = current % buckets
+            idle = ids[:, slot] != current
+            ids[idle, slot] = current
+            mins[idle, slot] = maxs[idle, slot] = lasts[idle, slot] = opens[idle, slot] = self.current[idle]
+            valid = ids[:, slots] == expected
+            low = mins[:, slots]
+            high = maxs[:, slots]
+            held = lasts[:, slots]
+            opening = opens[:, slots]
+
+        # Les buckets sans échantillon reprennent la dernière valeur connue, ou
+        # en début de fenêtre la valeur tenue avant le premier échantillon
+        last_valid = np.where(valid, np.arange(buckets), -1)
+        np.maximum.accumulate(last_valid, axis=1, out=last_valid)
+        first_valid = np.argmax(valid, axis=1)
+        leading = opening[np.arange(self.num_axes), first_valid][:, None]
+        filled = np.where(last_valid >= 0, np.take_along_axis(held, np.maximum(last_valid, 0), axis=1), leading)
+        low = np.where(valid, low, filled)
+        high = np.where(valid, high, filled)
+
+        if 0 < columns < buckets:
+            edges = np.linspace(0, buckets, columns + 1).astype(np.int64)[:-1]
+            low = np.minimum.reduceat(low, edges, axis=1)
+            high = np.maximum.reduceat(high, edges, axis=1)
+        return low, high
+
+    def render(self, tier: int, now: float, columns: int) -> list:
+        """Lignes du graphe : '-' valeur stable, '|' plage min/max sur plusieurs lignes"""
+        np = self.np
+        low, high = self.window(tier, now, columns)
+        # Bandes de valeurs de chaque ligne, de +1.0 (haut) à -1.0 (bas)
+        tops = 1.0 - 2.0 * np.arange(HISTORY_ROWS) / HISTORY_ROWS
+        bottoms = tops - 2.0 / HISTORY_ROWS
+        bottoms[-1] = -np.inf
+        tops[0] = np.inf
+        lines = []
+        for axis in range(self.num_axes):
+            hit = (high[axis][None, :] >= bottoms[:, None]) & (low[axis][None, :] < tops[:, None])
+            spans = hit.sum(axis=0) > 1
+            chart = np.where(hit, np.where(spans, "|", "-"), " ")
+            for row in range(HISTORY_ROWS):
+                label = f"  {axis:2d}: " if row == 0 else "      "
+                lines.append(label + "".join(chart[row].tolist()))
+        return lines
+
+def start_history_sampler(joystick, history: AxisHistory):
+    """Échantillonne les axes depuis evdev dans un thread, indépendamment de l'affichage
+
+    Retourne une fonction d'arrêt, ou None si evdev n'est pas utilisable.
+    """
+    try:
+        from evdev import InputDevice, ecodes
+    except ImportError:
+        return None
+    device_path = find_evdev_device(joystick)
+    if not device_path:
+        return None
+    try:
+        device = InputDevice(device_path)
+    except (OSError, PermissionError):
+        return None
+
+    axis_index = {code: i for i, code in enumerate(evdev_axis_codes(device))}
+    axis_ranges = {}
+    for code in axis_index:
+        info = device.absinfo(code)
+        axis_ranges[code] = (info.min, max(info.max - info.min, 1))
+    stop = threading.Event()
+
+    def sample():
+        try:
+            while not stop.is_set():
+                ready, _, _ = select.select([device], [], [], 0.1)
+                if not ready:
+                    continue
+                for event in device.read():
+                    if event.type == ecodes.EV_ABS and event.code in axis_index:
+                        low, span = axis_ranges[event.code]
+                        value = 2.0 * (event.value - low) / span - 1.0
+                        # Horodatage kernel en CLOCK_REALTIME, comme time.time()
+                        history.add(axis_index[event.code], event.sec + event.usec / 1e6, value)
+        except OSError:
+            pass
+        finally:
+            device.close()
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    def stop_sampler():
+        stop.set()
+        sampler.join()
+
+    return stop_sampler
+
+# Tables de rendu : les chaînes affichées sont précalculées au lieu d'être
+# reconstruites à chaque image.
+HAT_POSITIONS = tuple((x, y) for y in (1, 0, -1) for x in (-1, 0, 1))
+HAT_SDL_VALUES = {position: hat_to_sdl(*position) for position in HAT_POSITIONS}
+BUTTON_CELLS = ("0  [ ]", "1  [#]")
+
+def build_hat_diagram(x: int, y: int) -> tuple:
+    """Diagramme 3x3 d'un hat et état de ses quatre directions"""
+    cells = ['O' if (cx, cy) == (x, y) else ' ' for cx, cy in HAT_POSITIONS]
+    return (
+        f"  +-----+  up:    {int(y == 1)}",
+        f"  |{cells[0]} {cells[1]} {cells[2]}|  down:  {int(y == -1)}",
+        f"  |{cells[3]} {cells[4]} {cells[5]}|  left:  {int(x == -1)}",
+        f"  |{cells[6]} {cells[7]} {cells[8]}|  right: {int(x == 1)}",
+        "  +-----+",
+    )
+
+HAT_DIAGRAMS = {position: build_hat_diagram(*position) for position in HAT_POSITIONS}
+
+class RenderTables:
+    """Barres d'axe précalculées pour une largeur de barre donnée"""
+
+    def __init__(self, bar_len: int):
+        self.bar_len = max(bar_len, 0)
+        self.scale = (self.bar_len - 1) / 2.0
+        self.bars = tuple(print_bar(pos, self.bar_len) for pos in range(self.bar_len)) or (print_bar(0, 0),)
+
+    def bar(self, value: float) -> str:
+        """Barre d'un axe dont la valeur va de -1.0 à 1.0"""
+        pos = int((value + 1.0) * self.scale)
+        return self.bars[min(max(pos, 0), len(self.bars) - 1)]
+
+_render_tables = {}
+
+def get_render_tables(bar_len: int) -> RenderTables:
+    """Tables de rendu pour cette largeur, construites au premier usage"""
+    tables = _render_tables.get(bar_len)
+    if tables is None:
+        tables = _render_tables[bar_len] = RenderTables(bar_len)
+    return tables
+
+def format_test_screen(name: str, joy_id: int, axes: list, buttons: list, hats: list, balls: list,
+                       cols: int, mapping: Optional[tuple] = None, history: Optional[AxisHistory] = None,
+                       history_tier: int = HISTORY_DEFAULT_TIER) -> list:
+    """Construit les lignes de l'écran --test"""
+    lines = [f"Joystick Name:   '{name}'", f"Joystick Number: {joy_id}", ""]
+
+    if mapping is not None:
+        # Vue contrôleur : état brut traduit par la table du mapping
+        controller_name, source, table = mapping
+        mapped_axes, mapped_buttons = apply_controller_mapping(table, axes, buttons, hats)
+        tables = get_render_tables(min(40, cols - 30))
+        lines.append(f"Controller '{controller_name}' ({source}):")
+        lines.append("")
+        lines.append(f"Axes {len(CONTROLLER_AXES):2d}:")
+        for axis_name, value in zip(CONTROLLER_AXES, mapped_axes):
+            lines.append(f"  {axis_name:>13s}: {int(value * 32767):6d}  {tables.bar(value)}")
+        lines.append("")
+        lines.append(f"Buttons {len(CONTROLLER_BUTTONS):2d}:")
+        for button_name, pressed in zip(CONTROLLER_BUTTONS, mapped_buttons):
+            lines.append(f"  {button_name:>13s}: {BUTTON_CELLS[pressed]}")
+        lines.append("")
+    else:
+        tables = get_render_tables(min(40, cols - 20))
+        lines.append(f"Axes {len(axes):2d}:")
+        for i, value in enumerate(axes):
+            # Valeur SDL simulée et barre précalculée
+            lines.append(f"  {i:2d}: {int(value * 32767):6d}  {tables.bar(value)}")
+        lines.append("")
+        lines.append(f"Buttons {len(buttons):2d}:")
+        for i, pressed in enumerate(buttons):
+            lines.append(f"  {i:2d}: {BUTTON_CELLS[bool(pressed)]}")
+        lines.append("")
+        lines.append(f"Hats {len(hats):2d}:")
+        for i, hat in enumerate(hats):
+            lines.append(f"  {i:2d}: value: {HAT_SDL_VALUES[hat]}")
+            lines.extend(HAT_DIAGRAMS[hat])
+        lines.append("")
+
+    lines.append(f"Balls {len(balls):2d}:")
+    for i, (x, y) in enumerate(balls):
+        lines.append(f"  {i:2d}: {x:6d} {y:6d}")
+    lines.append("")
+
+    if history is not None:
+        window = HISTORY_TIERS[history_tier][0]
+        lines.append(f"History {window:g} s (keys 1/2/3: {'/'.join(f'{w:g}' for w, _ in HISTORY_TIERS)} s):")
+        lines.extend(history.render(history_tier, time.time(), max(cols - 8, 1)))
+        lines.append("")
+
+    lines.append("Press Ctrl-c to exit")
+    return lines
+
+def format_event_line(joy: int, kind: int, index: int, value: int) -> str:
+    """Ligne --event d'un mouvement d'axe, de bouton ou de hat"""
+    if kind == CAPTURE_AXIS:
+        return f"SDL_JOYAXISMOTION: joystick: {joy} axis: {index} value: {value}"
+    if kind == CAPTURE_BUTTON:
+        if value:
+            return f"SDL_JOYBUTTONDOWN: joystick: {joy} button: {index} state: 1"
+        return f"SDL_JOYBUTTONUP: joystick: {joy} button: {index} state: 0"
+    return f"SDL_JOYHATMOTION: joystick: {joy} hat: {index} value: {value}"
+
+def bench_render(frames: int):
+    """Microbenchmark du formatage des écrans --test et des lignes --event"""
+    import random
+
+    rng = random.Random(0)
+    axes = [0.0] * 8
+    buttons = [False] * 16
+    hats = [(0, 0)] * 2
+    balls = [(0, 0)]
+    mapping = ("Benchmark Controller", "benchmark", compile_controller_mapping(
+        [("a", "b0"), ("b", "b1"), ("x", "b2"), ("y", "b3"), ("leftshoulder", "b4"), ("rightshoulder", "b5"),
+         ("back", "b6"), ("start", "b7"), ("guide", "b8"), ("leftstick", "b9"), ("rightstick", "b10"),
+         ("leftx", "a0"), ("lefty", "a1"), ("lefttrigger", "a2"), ("rightx", "a3"), ("righty", "a4"),
+         ("righttrigger", "a5"), ("dpup", "h0.1"), ("dpright", "h0.2"), ("dpdown", "h0.4"), ("dpleft", "h0.8")]))
+
+    # États précalculés : seul le formatage est mesuré
+    states = []
+    for _ in range(256):
+        axes = [rng.uniform(-1.0, 1.0) for _ in axes]
+        buttons = [rng.random() < 0.2 for _ in buttons]
+        hats = [rng.choice(HAT_POSITIONS) for _ in hats]
+        states.append((list(axes), list(buttons), list(hats)))
+
+    start = time.perf_counter()
+    for cols in range(20, 200):
+        RenderTables(min(40, cols - 20))
+    build_us = (time.perf_counter() - start) * 1e6 / 180
+
+    print(f"Render tables: {build_us:.1f} us per width")
+    for label, view in (("--test", None), ("--test --mapped", mapping)):
+        start = time.perf_counter()
+        for frame in range(frames):
+            frame_axes, frame_buttons, frame_hats = states[frame & 255]
+            format_test_screen("Benchmark", 0, frame_axes, frame_buttons, frame_hats, balls, 80, view)
+        elapsed = time.perf_counter() - start
+        print(f"{label:16s} {frames} frames: {elapsed * 1e6 / frames:8.2f} us per frame")
+
+    events = []
+    for _ in range(256):
+        kind = rng.choice((CAPTURE_AXIS, CAPTURE_BUTTON, CAPTURE_HAT))
+        if kind == CAPTURE_AXIS:
+            events.append((kind, rng.randrange(8), rng.uniform(-1.0, 1.0)))
+        elif kind == CAPTURE_BUTTON:
+            events.append((kind, rng.randrange(16), rng.randrange(2)))
+        else:
+            events.append((kind, rng.randrange(2), rng.choice(HAT_POSITIONS)))
+    count = frames * 20
+    start = time.perf_counter()
+    for n in range(count):
+        kind, index, value = events[n & 255]
+        if kind == CAPTURE_AXIS:
+            value = int(value * 32767)
+        elif kind == CAPTURE_HAT:
+            value = HAT_SDL_VALUES[value]
+        format_event_line(0, kind, index, value)
+    elapsed = time.perf_counter() - start
+    print(f"{'--event':16s} {count} events: {elapsed * 1e6 / count:8.2f} us per event")
+
+def test_joystick(joy_id: int, mapped: bool = False, db_path: Optional[str] = None, idle: bool = False,
+                  show_history: bool = False):
     """Test interactif d'une manette avec affichage curses"""
     pygame.init()
     pygame.joystick.init()
@@ -86,6 +794,40 @@ def test_joystick(joy_id: int):
         print(f"Unable to open joystick {joy_id}: {e}")
         return
     
+    # Table de traduction précompilée pour la vue contrôleur
+    mapping = None
+    if mapped:
+        source, name, table = find_controller_mapping(joy_id, joystick, db_path)
+        mapping = (name, source, table)
+        if table is None:
+            print(f"No game controller mapping found for joystick {joy_id} (GUID {joystick.get_guid()})")
+            joystick.quit()
+            pygame.quit()
+            return
+    
+    # Historique des axes, échantillonné depuis evdev si possible
+    history = None
+    stop_sampler = None
+    history_tier = HISTORY_DEFAULT_TIER
+    if show_history:
+        try:
+            history = AxisHistory(joystick.get_numaxes())
+        except ImportError:
+            print("numpy not available, axis history disabled (pip install numpy)")
+        if history is not None:
+            pygame.event.pump()
+            for i in range(joystick.get_numaxes()):
+                history.add(i, time.time(), joystick.get_axis(i))
+            stop_sampler = start_history_sampler(joystick, history)
+            if stop_sampler is None:
+                print("evdev device not available, sampling axis history from SDL events")
+    
+    # Mode veille : réveil uniquement sur entrée manette, clavier ou redimensionnement
+    waiter = None
+    if idle:
+        waiter = open_input_waiter(joystick, watch_stdin=True, watch_resize=True)
+    loop_stats = LoopStats()
+    
     # Initialiser curses
     stdscr = curses.initscr()
     try:
@@ -107,13 +849,37 @@ def test_joystick(joy_id: int):
         
         clock = pygame.time.Clock()
         quit_flag = False
+        redraw_pending = True
+        last_draw = 0.0
         
         while not quit_flag:
+            if waiter is not None:
+                # Un rafraîchissement différé fixe le délai maximal d'attente
+                timeout = None
+                if redraw_pending:
+                    timeout = max(0.0, last_draw + REDRAW_INTERVAL - time.monotonic())
+                if WAKE_RESIZE in waiter.wait(timeout):
+                    lines, cols = os.get_terminal_size()
+                    curses.resizeterm(lines, cols)
+                    curses.update_lines_cols()
+                    redraw_pending = True
+            loop_stats.wakeup()
+            
             # Traiter les événements pygame
             pygame.event.pump()
             
             something_new = False
             
+            if history is not None:
+                if stop_sampler is None:
+                    # Sans evdev : tous les mouvements d'axe SDL, horodatés à l'image
+                    now = time.time()
+                    for event in pygame.event.get(pygame.JOYAXISMOTION):
+                        if event.joy == joy_id:
+                            history.add(event.axis, now, event.value)
+                # Le graphe défile même sans nouvelle entrée
+                redraw_pending = True
+            
             # Lire les axes
             for i in range(num_axes):
                 new_value = joystick.get_axis(i)
@@ -143,110 +909,48 @@ def test_joystick(joy_id: int):
                     something_new = True
             
             if something_new:
+                redraw_pending = True
+            
+            # En mode veille, les rafales sont limitées à 30 rafraîchissements par seconde
+            if redraw_pending and (waiter is None or time.monotonic() - last_draw >= REDRAW_INTERVAL):
+                redraw_pending = False
+                last_draw = time.monotonic()
+                lines = format_test_screen(joystick.get_name(), joy_id, axes, buttons, hats, balls,
+                                           curses.COLS, mapping, history, history_tier)
                 stdscr.clear()
-                row = 0
-                
-                stdscr.addstr(row, 0, f"Joystick Name:   '{joystick.get_name()}'")
-                row += 1
-                stdscr.addstr(row, 0, f"Joystick Number: {joy_id}")
-                row += 2
-                
-                # Afficher les axes
-                stdscr.addstr(row, 0, f"Axes {num_axes:2d}:")
-                row += 1
-                for i in range(num_axes):
-                    # Convertir la valeur de l'axe (-1.0 à 1.0) en position pour la barre
-                    bar_len = min(40, curses.COLS - 20)
-                    pos = int((axes[i] + 1.0) * (bar_len - 1) / 2.0)
-                    axis_int = int(axes[i] * 32767)  # Simuler les valeurs SDL
-                    bar = print_bar(pos, bar_len)
-                    stdscr.addstr(row, 0, f"  {i:2d}: {axis_int:6d}  {bar}")
-                    row += 1
-                row += 1
-                
-                # Afficher les boutons
-                stdscr.addstr(row, 0, f"Buttons {num_buttons:2d}:")
-                row += 1
-                for i in range(num_buttons):
-                    state = 1 if buttons[i] else 0
-                    symbol = "[#]" if buttons[i] else "[ ]"
-                    stdscr.addstr(row, 0, f"  {i:2d}: {state}  {symbol}")
-                    row += 1
-                row += 1
-                
-                # Afficher les hats
-                stdscr.addstr(row, 0, f"Hats {num_hats:2d}:")
-                row += 1
-                for i in range(num_hats):
-                    x, y = hats[i]
-                    # Convertir en format SDL hat
-                    hat_value = 0
-                    if y == 1: hat_value |= 1  # UP
-                    if y == -1: hat_value |= 4  # DOWN
-                    if x == -1: hat_value |= 8  # LEFT
-                    if x == 1: hat_value |= 2   # RIGHT
-                    
-                    stdscr.addstr(row, 0, f"  {i:2d}: value: {hat_value}")
-                    row += 1
-                    
-                    # Afficher le diagramme du hat
-                    up = '1' if y == 1 else '0'
-                    down = '1' if y == -1 else '0'
-                    left = '1' if x == -1 else '0'
-                    right = '1' if x == 1 else '0'
-                    
-                    # Positions dans le diagramme 3x3
-                    ul = 'O' if (y == 1 and x == -1) else ' '
-                    u = 'O' if (y == 1 and x == 0) else ' '
-                    ur = 'O' if (y == 1 and x == 1) else ' '
-                    l = 'O' if (y == 0 and x == -1) else ' '
-                    c = 'O' if (y == 0 and x == 0) else ' '
-                    r = 'O' if (y == 0 and x == 1) else ' '
-                    dl = 'O' if (y == -1 and x == -1) else ' '
-                    d = 'O' if (y == -1 and x == 0) else ' '
-                    dr = 'O' if (y == -1 and x == 1) else ' '
-                    
-                    stdscr.addstr(row, 0, f"  +-----+  up:    {up}")
-                    row += 1
-                    stdscr.addstr(row, 0, f"  |{ul} {u} {ur}|  down:  {down}")
-                    row += 1
-                    stdscr.addstr(row, 0, f"  |{l} {c} {r}|  left:  {left}")
-                    row += 1
-                    stdscr.addstr(row, 0, f"  |{dl} {d} {dr}|  right: {right}")
-                    row += 1
-                    stdscr.addstr(row, 0, "  +-----+")
-                    row += 1
-                row += 1
-                
-                # Afficher les balls
-                if num_balls > 0:
-                    stdscr.addstr(row, 0, f"Balls {num_balls:2d}:")
-                    row += 1
-                    for i in range(num_balls):
-                        x, y = balls[i]
-                        stdscr.addstr(row, 0, f"  {i:2d}: {x:6d} {y:6d}")
-                        row += 1
-                else:
-                    stdscr.addstr(row, 0, f"Balls {num_balls:2d}:")
-                    row += 1
-                row += 1
-                
-                stdscr.addstr(row, 0, "Press Ctrl-c to exit")
+                # Les lignes qui ne tiennent pas dans le terminal sont coupées
+                for row, line in enumerate(lines[:curses.LINES - 1]):
+                    stdscr.addstr(row, 0, line[:curses.COLS - 1])
                 stdscr.refresh()
             
             # Vérifier les touches
             key = stdscr.getch()
             if key == 3:  # Ctrl-C
                 quit_flag = True
+            elif key == curses.KEY_RESIZE:
+                curses.update_lines_cols()
+                redraw_pending = True
+            elif history is not None and ord('1') <= key < ord('1') + len(HISTORY_TIERS):
+                history_tier = key - ord('1')
+                redraw_pending = True
             
-            clock.tick(30)  # 30 FPS
+            if waiter is None:
+                clock.tick(30)  # 30 FPS
             
+    except KeyboardInterrupt:
+        pass
     finally:
         curses.endwin()
+        if stop_sampler is not None:
+            stop_sampler()
+        if waiter is not None:
+            waiter.close()
+        loop_stats.report("idle" if waiter is not None else "polling")
         joystick.quit()
         pygame.quit()
 
-def event_joystick(joy_id: int):
+def event_joystick(joy_id: int, capture_path: Optional[str] = None, compress: bool = False,
+                   idle: bool = False, db_path: Optional[str] = None):
     """Affiche les événements de la manette en temps réel"""
     pygame.init()
     pygame.joystick.init()
@@ -262,58 +966,661 @@ def event_joystick(joy_id: int):
         print(f"Unable to open joystick {joy_id}: {e}")
         return
     
-    print_joystick_info(joy_id, joystick)
+    capture = None
+    if capture_path:
+        try:
+            capture = CaptureWriter(capture_path, compress)
+        except OSError as e:
+            print(f"Unable to create capture {capture_path}: {e}")
+            joystick.quit()
+            pygame.quit()
+            return
+    
+    print_joystick_info(joy_id, joystick, db_path)
+    if capture:
+        print(f"Recording events to {capture_path}")
     print("Entering joystick test loop, press Ctrl-c to exit")
     
     clock = pygame.time.Clock()
+    waiter = None
+    if idle:
+        waiter = open_input_waiter(joystick)
+    loop_stats = LoopStats()
     
     try:
         while True:
+            if waiter is not None:
+                waiter.wait()
+            loop_stats.wakeup()
             for event in pygame.event.get():
                 if event.type == pygame.JOYAXISMOTION:
                     if event.joy == joy_id:
                         value = int(event.value * 32767)
-                        print(f"SDL_JOYAXISMOTION: joystick: {event.joy} axis: {event.axis} value: {value}")
+                        print(format_event_line(event.joy, CAPTURE_AXIS, event.axis, value))
+                        if capture:
+                            capture.append(event.joy, CAPTURE_AXIS, event.axis, value)
                 
                 elif event.type == pygame.JOYBUTTONDOWN:
                     if event.joy == joy_id:
-                        print(f"SDL_JOYBUTTONDOWN: joystick: {event.joy} button: {event.button} state: 1")
+                        print(format_event_line(event.joy, CAPTURE_BUTTON, event.button, 1))
+                        if capture:
+                            capture.append(event.joy, CAPTURE_BUTTON, event.button, 1)
                 
                 elif event.type == pygame.JOYBUTTONUP:
                     if event.joy == joy_id:
-                        print(f"SDL_JOYBUTTONUP: joystick: {event.joy} button: {event.button} state: 0")
+                        print(format_event_line(event.joy, CAPTURE_BUTTON, event.button, 0))
+                        if capture:
+                            capture.append(event.joy, CAPTURE_BUTTON, event.button, 0)
                 
                 elif event.type == pygame.JOYHATMOTION:
                     if event.joy == joy_id:
-                        # Convertir en format SDL
-                        x, y = event.value
-                        hat_value = 0
-                        if y == 1: hat_value |= 1   # UP
-                        if x == 1: hat_value |= 2   # RIGHT
-                        if y == -1: hat_value |= 4  # DOWN
-                        if x == -1: hat_value |= 8  # LEFT
-                        print(f"SDL_JOYHATMOTION: joystick: {event.joy} hat: {event.hat} value: {hat_value}")
+                        hat_value = HAT_SDL_VALUES[event.value]
+                        print(format_event_line(event.joy, CAPTURE_HAT, event.hat, hat_value))
+                        if capture:
+                            capture.append(event.joy, CAPTURE_HAT, event.hat, hat_value)
                 
                 elif event.type == pygame.JOYBALLMOTION:
                     if event.joy == joy_id:
                         print(f"SDL_JOYBALLMOTION: joystick: {event.joy} ball: {event.ball} x: {event.rel[0]} y: {event.rel[1]}")
+                        if capture:
+                            capture.append(event.joy, CAPTURE_BALL_X, event.ball, event.rel[0])
+                            capture.append(event.joy, CAPTURE_BALL_Y, event.ball, event.rel[1])
                 
                 elif event.type == pygame.JOYDEVICEADDED:
                     print(f"SDL_JOYDEVICEADDED which: {event.device_index}")
+                    if capture:
+                        capture.append(event.device_index, CAPTURE_DEVICE_ADDED, 0, 0)
                 
                 elif event.type == pygame.JOYDEVICEREMOVED:
                     print(f"SDL_JOYDEVICEREMOVED which: {event.instance_id}")
+                    if capture:
+                        capture.append(event.instance_id, CAPTURE_DEVICE_REMOVED, 0, 0)
                 
                 elif event.type == pygame.QUIT:
                     return
             
-            clock.tick(30)
+            if waiter is None:
+                clock.tick(30)
             
     except KeyboardInterrupt:
         print("Received interrupt, exiting")
     finally:
+        if capture:
+            capture.close()
+        if waiter is not None:
+            waiter.close()
+        loop_stats.report("idle" if waiter is not None else "polling")
+        joystick.quit()
+        pygame.quit()
+
+# Format de capture : en-tête de fichier, puis une suite de chunks colonnaires.
+# Chaque chunk contient CHUNK_HEADER suivi des colonnes brutes (little-endian),
+# éventuellement compressées séparément avec zlib.
+CAPTURE_MAGIC = b"JSTCAP\x00\x01"
+CAPTURE_CHUNK_MAGIC = b"CHNK"
+CAPTURE_CHUNK_ROWS = 4096
+CAPTURE_FLUSH_US = 1000000  # Un chunk au moins par seconde, même incomplet
+CAPTURE_CODEC_NONE = 0
+CAPTURE_CODEC_ZLIB = 1
+
+# (nom, typecode array, dtype numpy)
+CAPTURE_COLUMNS = (
+    ("time", "q", "<i8"),    # µs depuis l'epoch
+    ("device", "B", "u1"),
+    ("type", "B", "u1"),
+    ("index", "H", "<u2"),
+    ("value", "i", "<i4"),
+)
+CHUNK_HEADER = struct.Struct("<4sIB3x" + "I" * len(CAPTURE_COLUMNS))
+
+CAPTURE_AXIS = 0
+CAPTURE_BUTTON = 1
+CAPTURE_HAT = 2
+CAPTURE_BALL_X = 3
+CAPTURE_BALL_Y = 4
+CAPTURE_DEVICE_ADDED = 5
+CAPTURE_DEVICE_REMOVED = 6
+CAPTURE_TYPE_NAMES = ("axis", "button", "hat", "ball-x", "ball-y", "added", "removed")
+
+class CaptureWriter:
+    """Enregistre les événements dans un fichier de capture colonnaire"""
+
+    def __init__(self, path: str, compress: bool = False):
+        import array
+
+        self._array = array.array
+        self.codec = CAPTURE_CODEC_ZLIB if compress else CAPTURE_CODEC_NONE
+        self.file = open(path, "wb")
+        self.file.write(CAPTURE_MAGIC)
+        self.columns = [array.array(code) for _, code, _ in CAPTURE_COLUMNS]
+        self.first_time = 0
+
+    def append(self, device: int, event_type: int, index: int, value: int, t_us: Optional[int] = None):
+        if t_us is None:
+            t_us = time.time_ns() // 1000
+        if not self.columns[0]:
+            self.first_time = t_us
+        time_col, device_col, type_col, index_col, value_col = self.columns
+        time_col.append(t_us)
+        device_col.append(device & 0xFF)
+        type_col.append(event_type)
+        index_col.append(index & 0xFFFF)
+        value_col.append(value)
+        if len(time_col) >= CAPTURE_CHUNK_ROWS or t_us - self.first_time >= CAPTURE_FLUSH_US:
+            self.flush()
+
+    def flush(self):
+        rows = len(self.columns[0])
+        if rows == 0:
+            return
+        payloads = []
+        for column in self.columns:
+            if sys.byteorder != "little":
+                column.byteswap()
+            data = column.tobytes()
+            if self.codec == CAPTURE_CODEC_ZLIB:
+                import zlib
+                data = zlib.compress(data, 6)
+            payloads.append(data)
+        self.file.write(CHUNK_HEADER.pack(CAPTURE_CHUNK_MAGIC, rows, self.codec,
+                                          *(len(data) for data in payloads)))
+        for data in payloads:
+            self.file.write(data)
+        self.file.flush()
+        self.columns = [self._array(code) for _, code, _ in CAPTURE_COLUMNS]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def iter_capture_chunks(path: str):
+    """Lit une capture chunk par chunk, chaque colonne sous forme de tableau numpy"""
+    import numpy as np
+    import zlib
+
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a joystick capture file")
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if not header:
+                return
+            if len(header) < CHUNK_HEADER.size:
+                raise ValueError(f"{path}: truncated chunk header")
+            magic, rows, codec, *sizes = CHUNK_HEADER.unpack(header)
+            if magic != CAPTURE_CHUNK_MAGIC:
+                raise ValueError(f"{path}: corrupted chunk")
+            chunk = {}
+            for (name, _, dtype), size in zip(CAPTURE_COLUMNS, sizes):
+                data = f.read(size)
+                if len(data) < size:
+                    raise ValueError(f"{path}: truncated chunk")
+                if codec == CAPTURE_CODEC_ZLIB:
+                    data = zlib.decompress(data)
+                chunk[name] = np.frombuffer(data, dtype=dtype, count=rows)
+            yield chunk
+
+HISTOGRAM_BINS = 32
+HISTOGRAM_GLYPHS = " .:-=+*#%@"
+
+def format_histogram(counts) -> str:
+    """Représente un histogramme sous forme d'une ligne de caractères ASCII"""
+    peak = max(int(counts.max()), 1)
+    last = len(HISTOGRAM_GLYPHS) - 1
+    return "".join(HISTOGRAM_GLYPHS[(int(c) * last + peak - 1) // peak] for c in counts)
+
+def analyze_capture(path: str, rate_interval: float):
+    """Analyse vectorisée d'une capture, en mémoire constante"""
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy not available. Capture analysis requires numpy.")
+        print("Install with: pip install numpy")
+        return
+
+    interval_us = max(int(rate_interval * 1000000), 1)
+    type_counts = np.zeros(len(CAPTURE_TYPE_NAMES), dtype=np.int64)
+    # (device, axe) -> [histogramme, n, somme, min, max]
+    axes = {}
+    # (device, bouton) -> [appuis, n durées, somme, min, max]
+    buttons = {}
+    pending_press = {}
+    rate_bucket = None
+    rate_count = 0
+    total = 0
+    chunks = 0
+    first_time = None
+    last_time = None
+
+    def print_rate(bucket: int, count: int):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(bucket * interval_us / 1000000))
+        print(f"  {stamp}  {count / (interval_us / 1000000):10.1f} events/s")
+
+    print(f"Capture: {path}")
+    print(f"Event rate ({rate_interval:g} s buckets):")
+    try:
+        for chunk in iter_capture_chunks(path):
+            t = chunk["time"]
+            if len(t) == 0:
+                continue
+            chunks += 1
+            total += len(t)
+            if first_time is None:
+                first_time = int(t[0])
+            last_time = int(t[-1])
+            types = chunk["type"]
+            type_counts += np.bincount(types, minlength=len(type_counts))[:len(type_counts)]
+
+            # Débit : les buckets terminés sont affichés au fil de l'eau
+            bucket_ids, bucket_counts = np.unique(t // interval_us, return_counts=True)
+            for bucket, count in zip(bucket_ids.tolist(), bucket_counts.tolist()):
+                if rate_bucket is None:
+                    rate_bucket = bucket
+                if bucket > rate_bucket:
+                    print_rate(rate_bucket, rate_count)
+                    rate_bucket = bucket
+                    rate_count = 0
+                # Horloge revenue en arrière : compté dans le bucket courant
+                rate_count += count
+
+            keys = chunk["device"].astype(np.int64) << 16 | chunk["index"]
+
+            # Axes : histogramme et min/max/moyenne par axe
+            mask = types == CAPTURE_AXIS
+            if mask.any():
+                values = chunk["value"][mask].astype(np.int64)
+                axis_keys, inverse = np.unique(keys[mask], return_inverse=True)
+                bins = np.clip((values + 32768) * HISTOGRAM_BINS >> 16, 0, HISTOGRAM_BINS - 1)
+                hist = np.bincount(inverse * HISTOGRAM_BINS + bins,
+                                   minlength=len(axis_keys) * HISTOGRAM_BINS).reshape(-1, HISTOGRAM_BINS)
+                counts = np.bincount(inverse, minlength=len(axis_keys))
+                sums = np.bincount(inverse, weights=values, minlength=len(axis_keys))
+                mins = np.full(len(axis_keys), np.iinfo(np.int64).max)
+                maxs = np.full(len(axis_keys), np.iinfo(np.int64).min)
+                np.minimum.at(mins, inverse, values)
+                np.maximum.at(maxs, inverse, values)
+                for i, key in enumerate(axis_keys.tolist()):
+                    acc = axes.get(key)
+                    if acc is None:
+                        axes[key] = [hist[i].copy(), int(counts[i]), float(sums[i]), int(mins[i]), int(maxs[i])]
+                    else:
+                        acc[0] += hist[i]
+                        acc[1] += int(counts[i])
+                        acc[2] += float(sums[i])
+                        acc[3] = min(acc[3], int(mins[i]))
+                        acc[4] = max(acc[4], int(maxs[i]))
+
+            # Boutons : appuis et durées, un appui peut chevaucher deux chunks
+            mask = types == CAPTURE_BUTTON
+            if mask.any():
+                button_keys = keys[mask]
+                button_times = t[mask]
+                button_values = chunk["value"][mask] != 0
+                for key in np.unique(button_keys).tolist():
+                    select_key = button_keys == key
+                    times = button_times[select_key]
+                    pressed = button_values[select_key]
+                    acc = buttons.setdefault(key, [0, 0, 0, None, 0])
+                    carried = key in pending_press
+                    if carried:
+                        times = np.concatenate(([pending_press.pop(key)], times))
+                        pressed = np.concatenate(([True], pressed))
+                    previous = np.concatenate(([False], pressed[:-1]))
+                    starts = np.flatnonzero(pressed & ~previous)
+                    releases = np.flatnonzero(~pressed & previous)
+                    acc[0] += len(starts) - carried
+                    if len(releases):
+                        press_starts = starts[np.searchsorted(starts, releases) - 1]
+                        durations = times[releases] - times[press_starts]
+                        acc[1] += len(durations)
+                        acc[2] += int(durations.sum())
+                        low = int(durations.min())
+                        acc[3] = low if acc[3] is None else min(acc[3], low)
+                        acc[4] = max(acc[4], int(durations.max()))
+                    if pressed[-1]:
+                        pending_press[key] = int(times[starts[-1]])
+    except (OSError, ValueError) as e:
+        print(f"Unable to read capture: {e}")
+        return
+
+    if rate_bucket is not None:
+        print_rate(rate_bucket, rate_count)
+
+    print()
+    span = (last_time - first_time) / 1000000 if total else 0.0
+    print(f"Chunks: {chunks}  Events: {total}  Duration: {span:.1f} s")
+    for name, count in zip(CAPTURE_TYPE_NAMES, type_counts.tolist()):
+        if count:
+            print(f"  {name:8s} {count:10d}")
+
+    if axes:
+        print()
+        print(f"Axes (value histogram, {HISTOGRAM_BINS} bins from -32768 to 32767):")
+        for key in sorted(axes):
+            hist, count, total_value, low, high = axes[key]
+            print(f"  joystick: {key >> 16} axis: {key & 0xFFFF:2d}  n: {count:8d}  "
+                  f"min: {low:6d}  max: {high:6d}  mean: {total_value / count:8.1f}  [{format_histogram(hist)}]")
+
+    if buttons:
+        print()
+        print("Buttons (press duration in ms):")
+        for key in sorted(buttons):
+            presses, count, total_us, low, high = buttons[key]
+            if count:
+                durations = f"min: {low / 1000:8.1f}  mean: {total_us / count / 1000:8.1f}  max: {high / 1000:8.1f}"
+            else:
+                durations = "no completed press"
+            print(f"  joystick: {key >> 16} button: {key & 0xFFFF:2d}  presses: {presses:6d}  {durations}")
+
+# Protocole de transfert UDP : en-tête commun, puis soit une liste d'événements
+# (types CAPTURE_*), soit un instantané complet de l'état de la manette.
+FORWARD_MAGIC = 0x4A46
+FORWARD_VERSION = 1
+FORWARD_EVENTS = 0
+FORWARD_SNAPSHOT = 1
+FORWARD_HEADER = struct.Struct("<HBBIQ")       # magic, version, type, séquence, µs
+FORWARD_EVENT = struct.Struct("<BBh")          # type, index, valeur
+FORWARD_SNAPSHOT_HEADER = struct.Struct("<BBB")  # axes, boutons, hats
+FORWARD_MAX_EVENTS = 256
+FORWARD_LATENCY_SAMPLES = 100000
+
+def parse_host_port(text: str, default_host: str = "") -> tuple:
+    """Découpe 'HOST:PORT' (ou 'PORT') en (hôte, port)"""
+    host, sep, port = text.rpartition(":")
+    if not sep:
+        host = default_host
+    return host.strip("[]") or default_host, int(port)
+
+def clamp_int16(value: int) -> int:
+    return max(-32768, min(32767, value))
+
+def encode_forward_events(seq: int, events: list) -> bytes:
+    header = FORWARD_HEADER.pack(FORWARD_MAGIC, FORWARD_VERSION, FORWARD_EVENTS, seq, time.time_ns() // 1000)
+    return header + b"".join(FORWARD_EVENT.pack(t, i & 0xFF, clamp_int16(v)) for t, i, v in events)
+
+def encode_forward_snapshot(seq: int, axes: list, buttons: list, hats: list) -> bytes:
+    header = FORWARD_HEADER.pack(FORWARD_MAGIC, FORWARD_VERSION, FORWARD_SNAPSHOT, seq, time.time_ns() // 1000)
+    bits = bytearray((len(buttons) + 7) // 8)
+    for i, pressed in enumerate(buttons):
+        if pressed:
+            bits[i >> 3] |= 1 << (i & 7)
+    return (header + FORWARD_SNAPSHOT_HEADER.pack(len(axes), len(buttons), len(hats)) +
+            struct.pack(f"<{len(axes)}h", *(clamp_int16(v) for v in axes)) + bytes(bits) + bytes(hats))
+
+def decode_forward_snapshot(payload: bytes) -> tuple:
+    num_axes, num_buttons, num_hats = FORWARD_SNAPSHOT_HEADER.unpack_from(payload)
+    offset = FORWARD_SNAPSHOT_HEADER.size
+    axes = list(struct.unpack_from(f"<{num_axes}h", payload, offset))
+    offset += 2 * num_axes
+    bits = payload[offset:offset + (num_buttons + 7) // 8]
+    offset += len(bits)
+    buttons = [bool(bits[i >> 3] & (1 << (i & 7))) for i in range(num_buttons)]
+    hats = list(payload[offset:offset + num_hats])
+    return axes, buttons, hats
+
+def forward_joystick(joy_id: int, target: str, batch_ms: float, snapshot_ms: float):
+    """Transfère les événements de la manette en datagrammes UDP"""
+    import socket
+
+    try:
+        host, port = parse_host_port(target, "127.0.0.1")
+    except ValueError:
+        print(f"Invalid address: {target}")
+        return
+
+    pygame.init()
+    pygame.joystick.init()
+
+    if joy_id >= pygame.joystick.get_count():
+        print(f"Error: Joystick {joy_id} not found")
+        return
+
+    try:
+        joystick = pygame.joystick.Joystick(joy_id)
+        joystick.init()
+    except pygame.error as e:
+        print(f"Unable to open joystick {joy_id}: {e}")
+        return
+
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.connect((host, port))
+    except OSError as e:
+        print(f"Unable to reach {host}:{port}: {e}")
+        joystick.quit()
+        pygame.quit()
+        return
+
+    pygame.event.pump()
+    axes = [clamp_int16(int(joystick.get_axis(i) * 32767)) for i in range(joystick.get_numaxes())]
+    buttons = [bool(joystick.get_button(i)) for i in range(joystick.get_numbuttons())]
+    hats = [hat_to_sdl(*joystick.get_hat(i)) for i in range(joystick.get_numhats())]
+
+    def translate(event) -> Optional[tuple]:
+        """Convertit un événement pygame et met à jour l'état de l'instantané"""
+        if getattr(event, "joy", None) != joy_id:
+            return None
+        if event.type == pygame.JOYAXISMOTION:
+            axes[event.axis] = clamp_int16(int(event.value * 32767))
+            return CAPTURE_AXIS, event.axis, axes[event.axis]
+        if event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            buttons[event.button] = event.type == pygame.JOYBUTTONDOWN
+            return CAPTURE_BUTTON, event.button, int(buttons[event.button])
+        if event.type == pygame.JOYHATMOTION:
+            hats[event.hat] = hat_to_sdl(*event.value)
+            return CAPTURE_HAT, event.hat, hats[event.hat]
+        if event.type == pygame.JOYBALLMOTION:
+            return CAPTURE_BALL_X, event.ball, event.rel[0]
+        return None
+
+    seq = 0
+    datagrams = 0
+    forwarded = 0
+    batch = batch_ms / 1000.0
+    snapshot_interval = snapshot_ms / 1000.0
+    next_snapshot = time.monotonic()
+
+    print(f"Forwarding joystick {joy_id} '{joystick.get_name()}' to {host}:{port}")
+    print(f"Batch window: {batch_ms:g} ms, snapshot every {snapshot_ms:g} ms, press Ctrl-c to exit")
+
+    try:
+        while True:
+            # Instantané périodique : un datagramme perdu ne laisse pas de bouton bloqué
+            now = time.monotonic()
+            if now >= next_snapshot:
+                sock.send(encode_forward_snapshot(seq, axes, buttons, hats))
+                seq = (seq + 1) & 0xFFFFFFFF
+                datagrams += 1
+                next_snapshot = max(next_snapshot + snapshot_interval, now)
+
+            # pygame.event.wait(0) bloque indéfiniment : attendre au moins 1 ms
+            timeout_ms = max(1, int((next_snapshot - now) * 1000))
+            event = pygame.event.wait(timeout_ms)
+            if event.type != pygame.NOEVENT:
+                # Les événements reçus pendant la fenêtre partent ensemble
+                events = []
+                deadline = time.monotonic() + batch
+                while True:
+                    if event.type == pygame.QUIT:
+                        return
+                    translated = translate(event)
+                    if translated is not None:
+                        events.append(translated)
+                        if translated[0] == CAPTURE_BALL_X:
+                            events.append((CAPTURE_BALL_Y, event.ball, event.rel[1]))
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or len(events) >= FORWARD_MAX_EVENTS:
+                        break
+                    event = pygame.event.wait(max(1, int(remaining * 1000)))
+                    if event.type == pygame.NOEVENT:
+                        break
+                if events:
+                    sock.send(encode_forward_events(seq, events))
+                    seq = (seq + 1) & 0xFFFFFFFF
+                    datagrams += 1
+                    forwarded += len(events)
+    except KeyboardInterrupt:
+        print("Received interrupt, exiting")
+    except OSError as e:
+        print(f"Forwarding failed: {e}")
+    finally:
+        sock.close()
         joystick.quit()
         pygame.quit()
+        print(f"Sent {datagrams} datagrams, {forwarded} events")
+
+class VirtualJoystick:
+    """Manette virtuelle uinput qui rejoue l'état reçu"""
+
+    def __init__(self, num_axes: int, num_buttons: int, num_hats: int):
+        from evdev import UInput, AbsInfo, ecodes
+
+        self.ecodes = ecodes
+        axis_codes = [code for code in range(ecodes.ABS_X, ecodes.ABS_MISC)
+                      if not ecodes.ABS_HAT0X <= code <= ecodes.ABS_HAT3Y]
+        button_codes = (list(range(ecodes.BTN_SOUTH, ecodes.BTN_THUMBR + 1)) +
+                        list(range(ecodes.BTN_TRIGGER_HAPPY1, ecodes.BTN_TRIGGER_HAPPY40 + 1)))
+        self.axis_codes = axis_codes[:num_axes]
+        self.button_codes = button_codes[:num_buttons]
+        self.num_hats = min(num_hats, 4)
+
+        absinfo = AbsInfo(value=0, min=-32768, max=32767, fuzz=0, flat=0, resolution=0)
+        hatinfo = AbsInfo(value=0, min=-1, max=1, fuzz=0, flat=0, resolution=0)
+        abs_caps = [(code, absinfo) for code in self.axis_codes]
+        for hat in range(self.num_hats):
+            abs_caps += [(ecodes.ABS_HAT0X + 2 * hat, hatinfo), (ecodes.ABS_HAT0Y + 2 * hat, hatinfo)]
+        capabilities = {ecodes.EV_KEY: self.button_codes, ecodes.EV_ABS: abs_caps}
+        self.uinput = UInput(capabilities, name="sdl-jstest forwarded joystick")
+
+        self.axes = [0] * len(self.axis_codes)
+        self.buttons = [False] * len(self.button_codes)
+        self.hats = [0] * self.num_hats
+
+    def set_axis(self, index: int, value: int):
+        if index < len(self.axes) and self.axes[index] != value:
+            self.axes[index] = value
+            self.uinput.write(self.ecodes.EV_ABS, self.axis_codes[index], value)
+
+    def set_button(self, index: int, pressed: bool):
+        if index < len(self.buttons) and self.buttons[index] != pressed:
+            self.buttons[index] = pressed
+            self.uinput.write(self.ecodes.EV_KEY, self.button_codes[index], int(pressed))
+
+    def set_hat(self, index: int, value: int):
+        if index < self.num_hats and self.hats[index] != value:
+            self.hats[index] = value
+            x = 1 if value & 2 else -1 if value & 8 else 0
+            y = -1 if value & 1 else 1 if value & 4 else 0
+            self.uinput.write(self.ecodes.EV_ABS, self.ecodes.ABS_HAT0X + 2 * index, x)
+            self.uinput.write(self.ecodes.EV_ABS, self.ecodes.ABS_HAT0Y + 2 * index, y)
+
+    def sync(self):
+        self.uinput.syn()
+
+    def close(self):
+        self.uinput.close()
+
+def receive_joystick(bind: str):
+    """Reçoit les datagrammes de --forward et recrée les événements sur une manette virtuelle"""
+    import socket
+    from collections import deque
+
+    try:
+        host, port = parse_host_port(bind, "0.0.0.0")
+    except ValueError:
+        print(f"Invalid address: {bind}")
+        return
+
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+    except OSError as e:
+        print(f"Unable to listen on {host}:{port}: {e}")
+        return
+
+    try:
+        import evdev
+        have_uinput = True
+    except ImportError:
+        print("evdev not available, only measuring latency and loss")
+        have_uinput = False
+
+    virtual = None
+    last_seq = None
+    received = 0
+    lost = 0
+    stale = 0
+    invalid = 0
+    latencies = deque(maxlen=FORWARD_LATENCY_SAMPLES)
+
+    print(f"Listening on {host}:{port}, press Ctrl-c to exit")
+    try:
+        while True:
+            data = sock.recv(65536)
+            now_us = time.time_ns() // 1000
+            if len(data) < FORWARD_HEADER.size:
+                invalid += 1
+                continue
+            magic, version, kind, seq, t_us = FORWARD_HEADER.unpack_from(data)
+            if magic != FORWARD_MAGIC or version != FORWARD_VERSION:
+                invalid += 1
+                continue
+            received += 1
+            # Latence à sens unique : suppose des horloges synchronisées (exacte en local)
+            latencies.append(now_us - t_us)
+
+            if last_seq is not None:
+                gap = (seq - last_seq) & 0xFFFFFFFF
+                if gap == 0 or gap >= 0x80000000:
+                    # Datagramme dupliqué ou en retard : l'état plus récent est déjà appliqué
+                    stale += 1
+                    continue
+                lost += gap - 1
+            last_seq = seq
+
+            payload = data[FORWARD_HEADER.size:]
+            if kind == FORWARD_SNAPSHOT:
+                try:
+                    axes, buttons, hats = decode_forward_snapshot(payload)
+                except struct.error:
+                    invalid += 1
+                    continue
+                if virtual is None and have_uinput:
+                    try:
+                        virtual = VirtualJoystick(len(axes), len(buttons), len(hats))
+                        print(f"Created virtual joystick: {len(axes)} axes, {len(buttons)} buttons, {len(hats)} hats")
+                    except (OSError, evdev.UInputError) as e:
+                        print(f"Unable to create virtual joystick: {e}")
+                        have_uinput = False
+                if virtual is not None:
+                    for i, value in enumerate(axes):
+                        virtual.set_axis(i, value)
+                    for i, pressed in enumerate(buttons):
+                        virtual.set_button(i, pressed)
+                    for i, value in enumerate(hats):
+                        virtual.set_hat(i, value)
+                    virtual.sync()
+            elif kind == FORWARD_EVENTS and virtual is not None:
+                for offset in range(0, len(payload) - FORWARD_EVENT.size + 1, FORWARD_EVENT.size):
+                    event_type, index, value = FORWARD_EVENT.unpack_from(payload, offset)
+                    if event_type == CAPTURE_AXIS:
+                        virtual.set_axis(index, value)
+                    elif event_type == CAPTURE_BUTTON:
+                        virtual.set_button(index, bool(value))
+                    elif event_type == CAPTURE_HAT:
+                        virtual.set_hat(index, value)
+                virtual.sync()
+    except KeyboardInterrupt:
+        print("Received interrupt, exiting")
+    finally:
+        sock.close()
+        if virtual is not None:
+            virtual.close()
+
+    expected = received - stale + lost
+    loss = 100.0 * lost / expected if expected else 0.0
+    print(f"Received {received} datagrams, lost: {lost} ({loss:.2f} %), late/duplicate: {stale}, invalid: {invalid}")
+    print_timing_stats("one-way latency", list(latencies))
 
 def test_rumble(joy_id: int):
     """Test les effets de vibration"""
@@ -530,7 +1837,223 @@ def test_rumble_direct(joystick, joy_id: int) -> bool:
         print(f"Direct rumble method failed: {e}")
         return False
 
-def test_forcefeedback(joy_id: int):
+def print_timing_stats(label: str, values_us: list):
+    """Affiche min/moyenne/percentiles/max d'une série de mesures en µs"""
+    if not values_us:
+        print(f"  {label}: no samples")
+        return
+    ordered = sorted(values_us)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        return ordered[min(count - 1, int(p * count))]
+
+    print(f"  {label}: n: {count}  min: {ordered[0]:.1f}  mean: {sum(ordered) / count:.1f}  "
+          f"p50: {percentile(0.50):.1f}  p99: {percentile(0.99):.1f}  max: {ordered[-1]:.1f} (us)")
+
+HAPTIC_DEFAULT_RATE = 100.0
+HAPTIC_SPIN_NS = 1000000  # Attente active sur la dernière milliseconde
+
+def load_haptic_pattern(path: str) -> tuple:
+    """Lit un motif haptique : une ligne 'fort[,faible]' (0.0 à 1.0) par échantillon
+
+    La fréquence d'échantillonnage est donnée par une ligne 'rate=HZ' ou
+    '# rate: HZ' (suffixe 'Hz' accepté); une seule valeur pilote les deux moteurs.
+    """
+    rate = None
+    samples = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            directive = re.fullmatch(r"#?\s*rate\s*[:=]\s*([0-9.]+)\s*(?:hz)?", line, re.I)
+            if directive:
+                try:
+                    rate = float(directive.group(1))
+                except ValueError:
+                    raise ValueError(f"{path}:{line_number}: invalid rate '{line}'")
+                continue
+            if re.match(r"#\s*rate\s*[:=]", line, re.I):
+                print(f"Warning: {path}:{line_number}: ignoring unrecognized rate directive '{line}'")
+            if not line or line.startswith("#"):
+                continue
+            try:
+                values = [float(v) for v in line.replace(";", ",").replace(",", " ").split()]
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: invalid sample '{line}'")
+            if not values:
+                continue
+            strong = min(max(values[0], 0.0), 1.0)
+            weak = min(max(values[1], 0.0), 1.0) if len(values) > 1 else strong
+            samples.append((strong, weak))
+    return rate, samples
+
+def play_haptic_samples(update, samples: list, rate: float) -> tuple:
+    """Joue les échantillons à heure fixe, sans dérive cumulée
+
+    Les échéances sont absolues (départ + k * période) : un retard n'est pas
+    reporté sur les échantillons suivants, et les échantillons dont l'échéance
+    est déjà dépassée d'une période sont sautés.
+    Retourne (écarts µs, coûts de mise à jour µs, échantillons sautés).
+    """
+    period_ns = int(1e9 / rate)
+    deviations = []
+    costs = []
+    skipped = 0
+    start = time.perf_counter_ns() + period_ns
+    k = 0
+    while k < len(samples):
+        deadline = start + k * period_ns
+        now = time.perf_counter_ns()
+        if now - deadline >= period_ns:
+            late = (now - deadline) // period_ns
+            skipped += late
+            k += late
+            continue
+        remaining = deadline - now - HAPTIC_SPIN_NS
+        if remaining > 0:
+            time.sleep(remaining / 1e9)
+        while time.perf_counter_ns() < deadline:
+            pass
+        actual = time.perf_counter_ns()
+        update(*samples[k])
+        done = time.perf_counter_ns()
+        deviations.append((actual - deadline) / 1000)
+        costs.append((done - actual) / 1000)
+        k += 1
+    return deviations, costs, skipped
+
+def haptic_play_pygame(joystick, samples: list, rate: float) -> Optional[tuple]:
+    """Joue le motif via joystick.rumble (SDL 2.0.18+)"""
+    if not hasattr(joystick, 'rumble'):
+        print("Pygame rumble not available")
+        return None
+    if not joystick.rumble(0.0, 0.0, 1):
+        print("Pygame rumble not supported by this joystick")
+        return None
+    # Chaque mise à jour couvre deux périodes pour éviter les trous entre échantillons
+    hold_ms = max(int(2000 / rate), 1)
+
+    def update(strong: float, weak: float):
+        joystick.rumble(strong, weak, hold_ms)
+
+    try:
+        return play_haptic_samples(update, samples, rate)
+    except pygame.error as e:
+        print(f"Pygame rumble failed: {e}")
+        return None
+    finally:
+        joystick.stop_rumble()
+
+def haptic_play_evdev(joystick, samples: list, rate: float) -> Optional[tuple]:
+    """Joue le motif en modifiant sur place un effet FF_RUMBLE evdev"""
+    try:
+        from evdev import InputDevice, ff, ecodes
+    except ImportError:
+        print("evdev not available, skipping evdev backend")
+        return None
+
+    device_path = find_evdev_device(joystick)
+    if not device_path:
+        print("Could not find evdev device for this joystick")
+        return None
+
+    try:
+        device = InputDevice(device_path)
+    except (OSError, PermissionError) as e:
+        print(f"Unable to open {device_path}: {e}")
+        return None
+
+    try:
+        if ecodes.FF_RUMBLE not in device.capabilities().get(ecodes.EV_FF, []):
+            print("Device does not support FF_RUMBLE")
+            return None
+
+        rumble = ff.Rumble(strong_magnitude=0, weak_magnitude=0)
+        # Durée 0 : l'effet joue jusqu'à son arrêt explicite
+        effect = ff.Effect(ecodes.FF_RUMBLE, -1, 0, ff.Trigger(0, 0), ff.Replay(0, 0),
+                           ff.EffectType(ff_rumble_effect=rumble))
+        effect_id = device.upload_effect(effect)
+        # Les anciennes versions de python-evdev ne recopient pas l'id attribué
+        effect.id = effect_id
+        print(f"Using evdev device: {device_path}, effect ID: {effect_id}")
+
+        def update(strong: float, weak: float):
+            # Un upload avec un id existant met à jour l'effet (EVIOCSFF)
+            effect.u.ff_rumble_effect.strong_magnitude = int(strong * 0xFFFF)
+            effect.u.ff_rumble_effect.weak_magnitude = int(weak * 0xFFFF)
+            device.upload_effect(effect)
+
+        device.write(ecodes.EV_FF, effect_id, 1)
+        try:
+            return play_haptic_samples(update, samples, rate)
+        finally:
+            device.write(ecodes.EV_FF, effect_id, 0)
+            device.erase_effect(effect_id)
+    except OSError as e:
+        print(f"evdev haptic playback failed: {e}")
+        return None
+    finally:
+        device.close()
+
+def test_haptic_play(joy_id: int, path: str, rate_override: Optional[float] = None):
+    """Joue un motif haptique et mesure la précision temporelle de chaque backend"""
+    try:
+        rate, samples = load_haptic_pattern(path)
+    except (OSError, ValueError) as e:
+        print(f"Unable to load haptic pattern: {e}")
+        return
+    if rate_override is not None:
+        rate = rate_override
+    elif rate is None:
+        rate = HAPTIC_DEFAULT_RATE
+    if not samples:
+        print(f"No samples in {path}")
+        return
+    if rate <= 0:
+        print(f"Invalid sample rate: {rate}")
+        return
+
+    pygame.init()
+    pygame.joystick.init()
+
+    if joy_id >= pygame.joystick.get_count():
+        print(f"Error: Joystick {joy_id} not found")
+        return
+
+    try:
+        joystick = pygame.joystick.Joystick(joy_id)
+        joystick.init()
+    except pygame.error as e:
+        print(f"Unable to open joystick {joy_id}: {e}")
+        return
+
+    print(f"Playing {path} on joystick {joy_id}: '{joystick.get_name()}'")
+    print(f"{len(samples)} samples at {rate:g} Hz ({len(samples) / rate:.2f} s)")
+
+    results = {}
+    try:
+        for backend, play in (("pygame", haptic_play_pygame), ("evdev", haptic_play_evdev)):
+            print(f"\nBackend {backend}...")
+            result = play(joystick, samples, rate)
+            if result is not None:
+                results[backend] = result
+                print(f"Backend {backend} done")
+    except KeyboardInterrupt:
+        print("Received interrupt, exiting")
+    finally:
+        joystick.quit()
+        pygame.quit()
+
+    for backend, (deviations, costs, skipped) in results.items():
+        print(f"\n{backend}:")
+        print_timing_stats("schedule deviation", deviations)
+        print_timing_stats("update cost", costs)
+        print(f"  skipped samples: {skipped}")
+
+    if not results:
+        print("No haptic backend could play the pattern")
+
+def test_forcefeedback(joy_id: int):
     """Test complet des effets de force feedback (pour volants principalement)"""
     pygame.init()
     pygame.joystick.init()
@@ -859,6 +2382,809 @@ def test_advanced_forcefeedback(joystick, joy_id: int):
         print("- Proper permissions to access /dev/input/event* devices")
         print("- A device that supports force feedback")
 
+def evdev_button_codes(device) -> list:
+    """Liste les codes EV_KEY du device dans l'ordre des boutons SDL"""
+    from evdev import ecodes
+
+    keys = device.capabilities().get(ecodes.EV_KEY, [])
+    # SDL numérote d'abord BTN_JOYSTICK..KEY_MAX, puis les codes inférieurs
+    return (sorted(k for k in keys if k >= ecodes.BTN_JOYSTICK) +
+            sorted(k for k in keys if k < ecodes.BTN_JOYSTICK))
+
+def evdev_axis_codes(device) -> list:
+    """Liste les codes EV_ABS du device dans l'ordre des axes SDL (hats exclus)"""
+    from evdev import ecodes
+
+    codes = device.capabilities().get(ecodes.EV_ABS, [])
+    codes = [code[0] if isinstance(code, tuple) else code for code in codes]
+    return sorted(code for code in codes if not ecodes.ABS_HAT0X <= code <= ecodes.ABS_HAT3Y)
+
+def evdev_hat_indexes(device) -> dict:
+    """Associe chaque hat evdev présent (0 à 3) à son index de hat SDL"""
+    from evdev import ecodes
+
+    codes = device.capabilities().get(ecodes.EV_ABS, [])
+    codes = {code[0] if isinstance(code, tuple) else code for code in codes}
+    present = [hat for hat in range(4)
+               if ecodes.ABS_HAT0X + 2 * hat in codes or ecodes.ABS_HAT0Y + 2 * hat in codes]
+    return {hat: i for i, hat in enumerate(present)}
+
+def evdev_code_name(code: int) -> str:
+    """Nom lisible d'un code EV_KEY (BTN_SOUTH, KEY_A...)"""
+    from evdev import ecodes
+
+    name = ecodes.BTN.get(code) or ecodes.KEY.get(code) or str(code)
+    if isinstance(name, (list, tuple)):
+        name = name[0]
+    return name
+
+class ButtonBounceStats:
+    """Statistiques d'un bouton (taille fixe, indépendante de la durée du test)"""
+
+    def __init__(self):
+        self.stable = False         # État logique après filtrage des rebonds
+        self.raw = False            # Dernier état brut reçu du kernel
+        self.burst_count = 0        # Transitions dans la rafale en cours
+        self.burst_first = 0
+        self.burst_last = 0
+        self.burst_others = False   # Autre bouton tenu au début de la rafale
+        self.press_time = 0
+        self.press_others = False
+
+        self.transitions = 0
+        self.presses = 0
+        self.bounces = 0
+        self.extra_transitions = 0
+        self.chatter = 0
+        self.phantom = 0
+        self.max_span_us = 0
+        self.hold_count = 0
+        self.hold_sum_us = 0
+        self.hold_min_us = None
+        self.hold_max_us = 0
+
+class BounceTracker:
+    """Détecte rebonds, chatter et appuis fantômes à partir de transitions horodatées (µs)
+
+    Les transitions séparées de moins de window_us forment une rafale. Une rafale
+    qui change l'état du bouton est une transition réelle (rebond si elle en
+    contient plusieurs); une rafale qui revient à l'état initial est parasite.
+    Un appui plus court que pulse_us est aussi considéré comme parasite.
+    """
+
+    def __init__(self, window_us: int, pulse_us: int, report=None):
+        self.window_us = window_us
+        self.pulse_us = pulse_us
+        self.report = report
+        self.buttons = {}
+
+    def _stats(self, button: int) -> ButtonBounceStats:
+        stats = self.buttons.get(button)
+        if stats is None:
+            stats = self.buttons[button] = ButtonBounceStats()
+        return stats
+
+    def _emit(self, kind: str, button: int, detail: str):
+        if self.report:
+            self.report(kind, button, detail)
+
+    def _spurious(self, button: int, stats: ButtonBounceStats, others_held: bool, detail: str):
+        if others_held:
+            stats.phantom += 1
+            self._emit("PHANTOM", button, detail)
+        else:
+            stats.chatter += 1
+            self._emit("CHATTER", button, detail)
+
+    def _close_burst(self, button: int, stats: ButtonBounceStats):
+        count = stats.burst_count
+        span = stats.burst_last - stats.burst_first
+        stats.transitions += count
+        stats.max_span_us = max(stats.max_span_us, span)
+
+        if stats.raw != stats.stable:
+            if count > 1:
+                stats.bounces += 1
+                stats.extra_transitions += count - 1
+                self._emit("BOUNCE", button, f"transitions: {count} span: {span} us")
+            stats.stable = stats.raw
+            if stats.stable:
+                stats.presses += 1
+                stats.press_time = stats.burst_first
+                stats.press_others = stats.burst_others
+            else:
+                held = stats.burst_first - stats.press_time
+                stats.hold_count += 1
+                stats.hold_sum_us += held
+                stats.hold_max_us = max(stats.hold_max_us, held)
+                if stats.hold_min_us is None or held < stats.hold_min_us:
+                    stats.hold_min_us = held
+                if held < self.pulse_us:
+                    self._spurious(button, stats, stats.press_others, f"press: {held} us")
+        elif stats.stable:
+            # Relâchement fugitif pendant un appui
+            stats.bounces += 1
+            stats.extra_transitions += count
+            self._emit("BOUNCE", button, f"dropout: {count} transitions span: {span} us")
+        else:
+            self._spurious(button, stats, stats.burst_others, f"pulse: {count} transitions span: {span} us")
+
+        stats.burst_count = 0
+
+    def flush(self, now_us: int):
+        """Clôt les rafales dont la fenêtre est écoulée"""
+        for button, stats in self.buttons.items():
+            if stats.burst_count and now_us - stats.burst_last >= self.window_us:
+                self._close_burst(button, stats)
+
+    def finish(self):
+        """Clôt toutes les rafales en cours (fin de mesure)"""
+        for button, stats in self.buttons.items():
+            if stats.burst_count:
+                self._close_burst(button, stats)
+
+    def feed(self, button: int, pressed: bool, t_us: int):
+        """Ajoute une transition brute du bouton à l'instant t_us"""
+        self.flush(t_us)
+        stats = self._stats(button)
+        if pressed == stats.raw:
+            return
+
+        stats.raw = pressed
+        if stats.burst_count == 0:
+            stats.burst_first = t_us
+            stats.burst_others = any(other.stable for b, other in self.buttons.items() if b != button)
+        stats.burst_count += 1
+        stats.burst_last = t_us
+
+def print_bounce_summary(tracker: BounceTracker, names: dict):
+    """Affiche le tableau récapitulatif des rebonds par bouton"""
+    print()
+    print("Button  Code              Presses  Trans  Bounce  Extra  Chatter  Phantom  MaxSpan(us)  Hold min/mean/max (ms)")
+    for button in sorted(tracker.buttons):
+        stats = tracker.buttons[button]
+        if stats.hold_count:
+            hold = (f"{stats.hold_min_us / 1000:.1f}/"
+                    f"{stats.hold_sum_us / stats.hold_count / 1000:.1f}/"
+                    f"{stats.hold_max_us / 1000:.1f}")
+        else:
+            hold = "-"
+        print(f"  {button:4d}  {names.get(button, '?'):16s}  {stats.presses:7d}  {stats.transitions:5d}  "
+              f"{stats.bounces:6d}  {stats.extra_transitions:5d}  {stats.chatter:7d}  {stats.phantom:7d}  "
+              f"{stats.max_span_us:11d}  {hold}")
+
+def test_bounce(joy_id: int, window_ms: float, chatter_ms: float):
+    """Détecte les rebonds et appuis parasites des boutons via evdev"""
+    pygame.init()
+    pygame.joystick.init()
+
+    if joy_id >= pygame.joystick.get_count():
+        print(f"Error: Joystick {joy_id} not found")
+        return
+
+    try:
+        joystick = pygame.joystick.Joystick(joy_id)
+        joystick.init()
+    except pygame.error as e:
+        print(f"Unable to open joystick {joy_id}: {e}")
+        return
+
+    try:
+        from evdev import InputDevice, ecodes
+    except ImportError:
+        print("evdev not available. Bounce detection requires evdev.")
+        print("Install with: pip install evdev")
+        joystick.quit()
+        pygame.quit()
+        return
+
+    device_path = find_evdev_device(joystick)
+    joystick.quit()
+    pygame.quit()
+    if not device_path:
+        print("Could not find evdev device for this joystick")
+        return
+
+    try:
+        device = InputDevice(device_path)
+    except (OSError, PermissionError) as e:
+        print(f"Unable to open {device_path}: {e}")
+        return
+
+    codes = evdev_button_codes(device)
+    button_index = {code: i for i, code in enumerate(codes)}
+    names = {i: evdev_code_name(code) for code, i in button_index.items()}
+
+    def report(kind: str, button: int, detail: str):
+        print(f"{kind}: button: {button} ({names.get(button, '?')}) {detail}")
+
+    tracker = BounceTracker(int(window_ms * 1000), int(chatter_ms * 1000), report)
+
+    print(f"Using evdev device: {device_path} ({device.name})")
+    print(f"Bounce window: {window_ms} ms, chatter threshold: {chatter_ms} ms")
+    print("Entering bounce detection loop, press Ctrl-c to exit")
+
+    try:
+        while True:
+            ready, _, _ = select.select([device], [], [], window_ms / 1000.0)
+            if ready:
+                for event in device.read():
+                    # value 2 = répétition automatique, ignorée
+                    if event.type == ecodes.EV_KEY and event.value in (0, 1) and event.code in button_index:
+                        t_us = event.sec * 1000000 + event.usec
+                        tracker.feed(button_index[event.code], event.value == 1, t_us)
+            # Les axes bruités réveillent select en continu : clore les rafales
+            # échues après chaque lot, pas seulement sur timeout.
+            # Horodatages evdev en CLOCK_REALTIME par défaut
+            tracker.flush(time.time_ns() // 1000)
+    except KeyboardInterrupt:
+        print("Received interrupt, exiting")
+    except OSError as e:
+        print(f"Device read failed: {e}")
+    finally:
+        tracker.finish()
+        device.close()
+
+    print_bounce_summary(tracker, names)
+
+CROSSCHECK_WINDOW_US = 1000000  # Au-delà, un événement non apparié est compté comme manquant
+CROSSCHECK_SAMPLES = 100000
+CROSSCHECK_EXAMPLES = 10
+
+class CrossChecker:
+    """Apparie les événements vus par le kernel et par SDL, dans l'ordre de chaque entrée"""
+
+    def __init__(self, tolerance: int):
+        from collections import deque
+
+        self._deque = deque
+        self.tolerance = tolerance
+        self.kernel_pending = {}
+        self.sdl_pending = {}
+        self.delays = {kind: deque(maxlen=CROSSCHECK_SAMPLES) for kind in (CAPTURE_AXIS, CAPTURE_BUTTON, CAPTURE_HAT)}
+        self.matched = 0
+        self.coalesced = 0
+        self.kernel_only = 0
+        self.sdl_only = 0
+        self.examples = deque(maxlen=CROSSCHECK_EXAMPLES)
+
+    def _same(self, kind: int, a: int, b: int) -> bool:
+        if kind == CAPTURE_AXIS:
+            return abs(a - b) <= self.tolerance
+        return a == b
+
+    def _match(self, pending, key: tuple, value: int) -> Optional[tuple]:
+        """Retire et retourne la première entrée en attente de même valeur"""
+        entries = pending.get(key)
+        if not entries:
+            return None
+        for position, (other_value, t_us) in enumerate(entries):
+            if self._same(key[0], value, other_value):
+                break
+        else:
+            return None
+        skipped = position
+        for _ in range(position):
+            entries.popleft()
+        entries.popleft()
+        return skipped, t_us
+
+    def kernel_event(self, kind: int, index: int, value: int, t_us: int):
+        key = (kind, index)
+        found = self._match(self.sdl_pending, key, value)
+        if found is None:
+            self.kernel_pending.setdefault(key, self._deque()).append((value, t_us))
+            return
+        skipped, sdl_t = found
+        self.sdl_only += skipped
+        self._record(kind, sdl_t - t_us)
+
+    def sdl_event(self, kind: int, index: int, value: int, t_us: int):
+        key = (kind, index)
+        found = self._match(self.kernel_pending, key, value)
+        if found is None:
+            self.sdl_pending.setdefault(key, self._deque()).append((value, t_us))
+            return
+        skipped, kernel_t = found
+        # SDL ne transmet pas les valeurs d'axe intermédiaires inchangées après correction
+        if kind == CAPTURE_AXIS:
+            self.coalesced += skipped
+        else:
+            self.kernel_only += skipped
+        self._record(kind, t_us - kernel_t)
+
+    def _record(self, kind: int, delay_us: int):
+        self.matched += 1
+        self.delays[kind].append(delay_us)
+
+    def expire(self, now_us: int):
+        """Compte comme manquants les événements restés seuls trop longtemps"""
+        for pending, side in ((self.kernel_pending, "kernel"), (self.sdl_pending, "SDL")):
+            for (kind, index), entries in pending.items():
+                while entries and now_us - entries[0][1] > CROSSCHECK_WINDOW_US:
+                    value, t_us = entries.popleft()
+                    if side == "kernel":
+                        if kind == CAPTURE_AXIS:
+                            self.coalesced += 1
+                            continue
+                        self.kernel_only += 1
+                    else:
+                        self.sdl_only += 1
+                    self.examples.append((side, CAPTURE_TYPE_NAMES[kind], index, value, t_us))
+
+    def finish(self):
+        self.expire(float("inf"))
+
+def test_crosscheck(joy_id: int, tolerance: int):
+    """Compare les événements SDL aux horodatages kernel du même device evdev"""
+    from collections import deque
+
+    pygame.init()
+    pygame.joystick.init()
+
+    if joy_id >= pygame.joystick.get_count():
+        print(f"Error: Joystick {joy_id} not found")
+        return
+
+    try:
+        joystick = pygame.joystick.Joystick(joy_id)
+        joystick.init()
+    except pygame.error as e:
+        print(f"Unable to open joystick {joy_id}: {e}")
+        return
+
+    try:
+        from evdev import InputDevice, ecodes
+    except ImportError:
+        print("evdev not available. Cross-check requires evdev.")
+        print("Install with: pip install evdev")
+        joystick.quit()
+        pygame.quit()
+        return
+
+    device_path = find_evdev_device(joystick)
+    if not device_path:
+        print("Could not find evdev device for this joystick")
+        joystick.quit()
+        pygame.quit()
+        return
+
+    try:
+        device = InputDevice(device_path)
+    except (OSError, PermissionError) as e:
+        print(f"Unable to open {device_path}: {e}")
+        joystick.quit()
+        pygame.quit()
+        return
+
+    button_index = {code: i for i, code in enumerate(evdev_button_codes(device))}
+    axis_index = {code: i for i, code in enumerate(evdev_axis_codes(device))}
+    hat_index = evdev_hat_indexes(device)
+    axis_ranges = {}
+    for code in axis_index:
+        info = device.absinfo(code)
+        axis_ranges[code] = (info.min, max(info.max - info.min, 1), (info.min + info.max) / 2.0, info.flat)
+
+    kernel_events = deque()
+    stop = threading.Event()
+
+    def read_kernel():
+        """Thread de lecture evdev : normalise les événements en termes SDL"""
+        hat_state = {hat: [0, 0] for hat in hat_index}
+        try:
+            while not stop.is_set():
+                ready, _, _ = select.select([device], [], [], 0.1)
+                if not ready:
+                    continue
+                for event in device.read():
+                    t_us = event.sec * 1000000 + event.usec
+                    if event.type == ecodes.EV_KEY and event.value in (0, 1) and event.code in button_index:
+                        kernel_events.append((CAPTURE_BUTTON, button_index[event.code], event.value, t_us))
+                    elif event.type == ecodes.EV_ABS and event.code in axis_index:
+                        low, span, center, flat = axis_ranges[event.code]
+                        if abs(event.value - center) <= flat:
+                            value = 0
+                        else:
+                            value = int((event.value - low) * 65535 / span) - 32768
+                        kernel_events.append((CAPTURE_AXIS, axis_index[event.code], value, t_us))
+                    elif event.type == ecodes.EV_ABS and ecodes.ABS_HAT0X <= event.code <= ecodes.ABS_HAT3Y:
+                        hat = (event.code - ecodes.ABS_HAT0X) // 2
+                        if hat not in hat_state:
+                            continue
+                        hat_state[hat][(event.code - ecodes.ABS_HAT0X) % 2] = max(-1, min(1, event.value))
+                        x, y = hat_state[hat]
+                        # evdev : y négatif vers le haut, pygame : y positif vers le haut
+                        kernel_events.append((CAPTURE_HAT, hat_index[hat], hat_to_sdl(x, -y), t_us))
+        except OSError as e:
+            print(f"Device read failed: {e}")
+
+    checker = CrossChecker(tolerance)
+    reader = threading.Thread(target=read_kernel, daemon=True)
+    reader.start()
+
+    print(f"Cross-checking joystick {joy_id} '{joystick.get_name()}' against {device_path}")
+    print(f"Axis tolerance: {tolerance}, press Ctrl-c to exit")
+
+    try:
+        while True:
+            event = pygame.event.wait(10)
+            # Horodatage de réception côté SDL, même horloge (CLOCK_REALTIME) que evdev
+            now_us = time.time_ns() // 1000
+            if event.type == pygame.QUIT:
+                break
+            if getattr(event, "joy", None) == joy_id:
+                if event.type == pygame.JOYAXISMOTION:
+                    checker.sdl_event(CAPTURE_AXIS, event.axis, int(event.value * 32767), now_us)
+                elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+                    checker.sdl_event(CAPTURE_BUTTON, event.button, int(event.type == pygame.JOYBUTTONDOWN), now_us)
+                elif event.type == pygame.JOYHATMOTION:
+                    checker.sdl_event(CAPTURE_HAT, event.hat, hat_to_sdl(*event.value), now_us)
+            while kernel_events:
+                checker.kernel_event(*kernel_events.popleft())
+            checker.expire(now_us)
+    except KeyboardInterrupt:
+        print("Received interrupt, exiting")
+    finally:
+        stop.set()
+        reader.join()
+        device.close()
+        joystick.quit()
+        pygame.quit()
+
+    while kernel_events:
+        checker.kernel_event(*kernel_events.popleft())
+    checker.finish()
+
+    print()
+    print(f"Matched events: {checker.matched}")
+    print(f"Kernel only:    {checker.kernel_only}")
+    print(f"SDL only:       {checker.sdl_only}")
+    print(f"Axis values coalesced by SDL: {checker.coalesced}")
+    print("SDL delivery delay relative to kernel timestamp:")
+    for kind, delays in checker.delays.items():
+        print_timing_stats(CAPTURE_TYPE_NAMES[kind], list(delays))
+    if checker.examples:
+        print("Last unmatched events:")
+        for side, kind_name, index, value, t_us in checker.examples:
+            print(f"  {side} only: {kind_name} {index} value: {value} at {t_us} us")
+
+SOAK_LOOP_RATE = 100          # Itérations par seconde de la boucle de soak
+SOAK_HISTOGRAM_BUCKETS = 32   # Buckets log2 en µs
+SOAK_RECENT_EVENTS = 64       # Derniers événements joints au rollup d'une déconnexion
+SOAK_MAX_INDEX = 256
+
+class SoakAggregator:
+    """Agrège les événements d'un soak par fenêtre, en mémoire bornée
+
+    Seuls des compteurs, des tableaux de taille fixe et un tampon circulaire
+    sont conservés : la mémoire ne dépend pas de la durée du test.
+    """
+
+    def __init__(self):
+        from collections import deque
+
+        self.recent = deque(maxlen=SOAK_RECENT_EVENTS)
+        self.total_events = 0
+        self.total_disconnects = 0
+        self._reset(time.time())
+
+    def _reset(self, now: float):
+        self.window_start = now
+        self.type_counts = [0] * len(CAPTURE_TYPE_NAMES)
+        # axe -> [n, somme, min, max]
+        self.axes = {}
+        self.disconnects = 0
+        self.reconnects = 0
+        self.before_disconnect = None
+        self.loop_histogram = [0] * SOAK_HISTOGRAM_BUCKETS
+        self.loop_count = 0
+        self.loop_sum_us = 0
+        self.loop_max_us = 0
+
+    def record_event(self, kind: int, index: int, value: int):
+        self.type_counts[kind] += 1
+        self.total_events += 1
+        self.recent.append((round(time.time(), 6), CAPTURE_TYPE_NAMES[kind], index, value))
+        if kind == CAPTURE_AXIS and index < SOAK_MAX_INDEX:
+            stats = self.axes.get(index)
+            if stats is None:
+                self.axes[index] = [1, value, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                if value < stats[2]:
+                    stats[2] = value
+                if value > stats[3]:
+                    stats[3] = value
+
+    def record_loop(self, period_us: int):
+        bucket = min(SOAK_HISTOGRAM_BUCKETS - 1, max(period_us, 0).bit_length())
+        self.loop_histogram[bucket] += 1
+        self.loop_count += 1
+        self.loop_sum_us += period_us
+        if period_us > self.loop_max_us:
+            self.loop_max_us = period_us
+
+    def record_disconnect(self):
+        self.disconnects += 1
+        self.total_disconnects += 1
+        if self.before_disconnect is None:
+            self.before_disconnect = list(self.recent)
+
+    def record_reconnect(self):
+        self.reconnects += 1
+
+    def _loop_percentile_us(self, fraction: float) -> int:
+        """Borne supérieure du percentile, à la résolution du bucket log2"""
+        threshold = fraction * self.loop_count
+        seen = 0
+        for bucket, count in enumerate(self.loop_histogram):
+            seen += count
+            if count and seen >= threshold:
+                return 1 << bucket
+        return 0
+
+    def rollup(self, connected: bool) -> dict:
+        """Retourne le rollup de la fenêtre écoulée et en commence une nouvelle"""
+        now = time.time()
+        record = {
+            "start": round(self.window_start, 3),
+            "end": round(now, 3),
+            "connected": connected,
+            "events": {name: count for name, count in zip(CAPTURE_TYPE_NAMES, self.type_counts) if count},
+            "axes": {str(index): {"min": low, "max": high, "mean": round(total / count, 1)}
+                     for index, (count, total, low, high) in sorted(self.axes.items())},
+            "disconnects": self.disconnects,
+            "reconnects": self.reconnects,
+            "loop": {
+                "iterations": self.loop_count,
+                "mean_us": round(self.loop_sum_us / self.loop_count) if self.loop_count else 0,
+                "p99_us": self._loop_percentile_us(0.99),
+                "max_us": self.loop_max_us,
+                "histogram_log2_us": self.loop_histogram,
+            },
+        }
+        if self.before_disconnect is not None:
+            record["events_before_disconnect"] = self.before_disconnect
+        self._reset(now)
+        return record
+
+def open_soak_joystick(joy_id: int):
+    """Ouvre la manette joy_id, retourne None en cas d'échec"""
+    try:
+        joystick = pygame.joystick.Joystick(joy_id)
+        joystick.init()
+        return joystick
+    except pygame.error:
+        return None
+
+def test_soak(joy_id: int, duration: Optional[float], interval: float, output: str):
+    """Test d'endurance : rollups périodiques sur disque, mémoire constante"""
+    import json
+
+    pygame.init()
+    pygame.joystick.init()
+
+    if joy_id >= pygame.joystick.get_count():
+        print(f"Error: Joystick {joy_id} not found")
+        return
+
+    joystick = open_soak_joystick(joy_id)
+    if joystick is None:
+        print(f"Unable to open joystick {joy_id}")
+        return
+
+    # Identité utilisée pour reconnaître la manette après un rebranchement
+    guid = joystick.get_guid()
+    name = joystick.get_name()
+    instance_id = joystick.get_instance_id()
+
+    try:
+        out = open(output, "a")
+    except OSError as e:
+        print(f"Unable to open {output}: {e}")
+        joystick.quit()
+        pygame.quit()
+        return
+
+    aggregator = SoakAggregator()
+    clock = pygame.time.Clock()
+    start = time.monotonic()
+    next_rollup = start + interval
+    last_iteration = time.perf_counter_ns()
+
+    print(f"Soak test of joystick {joy_id} '{name}' ({guid})")
+    print(f"Rollup every {interval:g} s to {output}" +
+          (f", duration {duration:g} s" if duration else ", press Ctrl-c to exit"))
+
+    def write_rollup():
+        record = aggregator.rollup(joystick is not None)
+        out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        out.flush()
+        print(f"[{time.strftime('%H:%M:%S')}] events: {sum(record['events'].values())}  "
+              f"disconnects: {record['disconnects']}  reconnects: {record['reconnects']}  "
+              f"loop max: {record['loop']['max_us']} us  connected: {record['connected']}")
+
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.JOYDEVICEREMOVED:
+                    if joystick is not None and event.instance_id == instance_id:
+                        aggregator.record_event(CAPTURE_DEVICE_REMOVED, 0, 0)
+                        aggregator.record_disconnect()
+                        joystick.quit()
+                        joystick = None
+                    continue
+                if event.type == pygame.JOYDEVICEADDED:
+                    if joystick is None:
+                        candidate = open_soak_joystick(event.device_index)
+                        if candidate is not None and candidate.get_guid() == guid and candidate.get_name() == name:
+                            joystick = candidate
+                            instance_id = joystick.get_instance_id()
+                            aggregator.record_event(CAPTURE_DEVICE_ADDED, 0, 0)
+                            aggregator.record_reconnect()
+                        elif candidate is not None:
+                            candidate.quit()
+                    continue
+                if joystick is None or getattr(event, "instance_id", None) != instance_id:
+                    continue
+                if event.type == pygame.JOYAXISMOTION:
+                    aggregator.record_event(CAPTURE_AXIS, event.axis, int(event.value * 32767))
+                elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+                    aggregator.record_event(CAPTURE_BUTTON, event.button, int(event.type == pygame.JOYBUTTONDOWN))
+                elif event.type == pygame.JOYHATMOTION:
+                    aggregator.record_event(CAPTURE_HAT, event.hat, hat_to_sdl(*event.value))
+                elif event.type == pygame.JOYBALLMOTION:
+                    aggregator.record_event(CAPTURE_BALL_X, event.ball, event.rel[0])
+                    aggregator.record_event(CAPTURE_BALL_Y, event.ball, event.rel[1])
+
+            if time.monotonic() >= next_rollup:
+                write_rollup()
+                next_rollup += interval
+
+            clock.tick(SOAK_LOOP_RATE)
+            now_ns = time.perf_counter_ns()
+            aggregator.record_loop((now_ns - last_iteration) // 1000)
+            last_iteration = now_ns
+    except KeyboardInterrupt:
+        print("Received interrupt, exiting")
+    finally:
+        write_rollup()
+        out.close()
+        if joystick is not None:
+            joystick.quit()
+        pygame.quit()
+        print(f"Soak finished: {aggregator.total_events} events, {aggregator.total_disconnects} disconnects "
+              f"in {time.monotonic() - start:.0f} s")
+
+# ioctl evdev (linux/input.h), sans dépendance à python-evdev
+IOC_READ = 2
+EV_FF = 0x15
+FF_MAX = 0x7F
+FF_EFFECT_TYPES = (
+    ("RUMBLE", "RUM", 0x50), ("PERIODIC", "PER", 0x51), ("CONSTANT", "CON", 0x52),
+    ("SPRING", "SPR", 0x53), ("FRICTION", "FRI", 0x54), ("DAMPER", "DAM", 0x55),
+    ("INERTIA", "INE", 0x56), ("RAMP", "RMP", 0x57), ("SQUARE", "SQU", 0x58),
+    ("TRIANGLE", "TRI", 0x59), ("SINE", "SIN", 0x5A), ("SAW_UP", "SWU", 0x5B),
+    ("SAW_DOWN", "SWD", 0x5C), ("CUSTOM", "CUS", 0x5D), ("GAIN", "GAI", 0x60),
+    ("AUTOCENTER", "AUT", 0x61),
+)
+FF_CAPS_CACHE_NAME = "ffcaps.json"
+FF_CAPS_WORKERS = 32
+
+def _ioc(direction: int, type_char: str, number: int, size: int) -> int:
+    return (direction << 30) | (size << 16) | (ord(type_char) << 8) | number
+
+def eviocgbit(event_type: int, length: int) -> int:
+    return _ioc(IOC_READ, 'E', 0x20 + event_type, length)
+
+def eviocgname(length: int) -> int:
+    return _ioc(IOC_READ, 'E', 0x06, length)
+
+EVIOCGEFFECTS = _ioc(IOC_READ, 'E', 0x84, 4)
+
+def read_sysfs(path: str) -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def input_device_identity(device_path: str) -> Optional[str]:
+    """Identité stable d'un device, lue dans sysfs sans ouvrir le device"""
+    base = os.path.join("/sys/class/input", os.path.basename(device_path), "device")
+    if not os.path.isdir(base):
+        return None
+    fields = [read_sysfs(os.path.join(base, "id", field)) for field in ("bustype", "vendor", "product", "version")]
+    fields += [read_sysfs(os.path.join(base, "name")), read_sysfs(os.path.join(base, "uniq"))]
+    return ":".join(fields)
+
+def probe_ff_caps(device_path: str) -> dict:
+    """Lit les bits EV_FF et le nombre d'emplacements d'effets par ioctl uniquement"""
+    fd = os.open(device_path, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        name = bytearray(256)
+        fcntl.ioctl(fd, eviocgname(len(name)), name, True)
+        bits = bytearray(FF_MAX // 8 + 1)
+        fcntl.ioctl(fd, eviocgbit(EV_FF, len(bits)), bits, True)
+        slots = bytearray(4)
+        fcntl.ioctl(fd, EVIOCGEFFECTS, slots, True)
+    finally:
+        os.close(fd)
+    effects = [code for _, _, code in FF_EFFECT_TYPES if bits[code >> 3] & (1 << (code & 7))]
+    return {
+        "name": name.split(b"\0", 1)[0].decode(errors="replace"),
+        "effects": effects,
+        "slots": struct.unpack("i", slots)[0],
+    }
+
+def survey_ff_device(device_path: str, cache: dict, refresh: bool) -> dict:
+    """Capacités FF d'un device, depuis le cache si son identité est connue"""
+    identity = input_device_identity(device_path)
+    if identity is not None and not refresh and identity in cache:
+        return dict(cache[identity], path=device_path, cached=True)
+    try:
+        caps = probe_ff_caps(device_path)
+    except OSError as e:
+        return {"path": device_path, "error": e.strerror or str(e)}
+    if identity is not None:
+        cache[identity] = caps
+    return dict(caps, path=device_path, cached=False)
+
+def event_node_number(path: str) -> int:
+    digits = path[len('/dev/input/event'):]
+    return int(digits) if digits.isdigit() else -1
+
+def survey_ff_caps(refresh: bool = False):
+    """Recense en parallèle les effets force feedback de tous les devices d'entrée"""
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache_path = cache_file_path(FF_CAPS_CACHE_NAME)
+    cache = {}
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        pass
+    cache_before = dict(cache)
+
+    start = time.perf_counter()
+    paths = sorted(glob.glob('/dev/input/event*'), key=event_node_number)
+    if not paths:
+        print("No input devices found in /dev/input")
+        return
+    with ThreadPoolExecutor(max_workers=min(FF_CAPS_WORKERS, len(paths))) as pool:
+        results = list(pool.map(lambda path: survey_ff_device(path, cache, refresh), paths))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if cache != cache_before:
+        write_cache_file(cache_path, json.dumps(cache).encode())
+
+    with_ff = [r for r in results if r.get("effects")]
+    without_ff = [r for r in results if "error" not in r and not r.get("effects")]
+    errors = [r for r in results if "error" in r]
+
+    if with_ff:
+        header = "  ".join(short for _, short, _ in FF_EFFECT_TYPES)
+        print(f"{'Device':10s} {'Name':28s} Slots  {header}")
+        for result in with_ff:
+            effects = set(result["effects"])
+            cells = "  ".join(" X " if code in effects else " . " for _, _, code in FF_EFFECT_TYPES)
+            print(f"{os.path.basename(result['path']):10s} {result['name'][:28]:28s} {result['slots']:5d}  {cells}")
+        print()
+        print("Legend: " + ", ".join(f"{short}={name}" for name, short, _ in FF_EFFECT_TYPES))
+    else:
+        print("No device with force feedback found")
+
+    cached = sum(1 for r in results if r.get("cached"))
+    print(f"\nSurveyed {len(results)} devices in {elapsed_ms:.1f} ms ({cached} from cache): "
+          f"{len(with_ff)} with force feedback, {len(without_ff)} without, {len(errors)} inaccessible")
+    for result in errors:
+        print(f"  {result['path']}: {result['error']}")
+
 def print_help(program_name: str):
     """Affiche l'aide du programme"""
     print(f"Usage: {program_name} [OPTION]")
@@ -871,10 +3197,39 @@ def print_help(program_name: str):
     print("  --version              Print version number and exit")
     print("  -l, --list             Search for available joysticks and list their properties")
     print("  -t, --test JOYNUM      Display a graphical representation of the current joystick state")
+    print("  --idle                 With --test or --event, sleep until input instead of polling at 30 Hz")
+    print("  --history              With --test, show recent axis values over 1 s, 10 s or 60 s (requires numpy)")
+    print("  --mapped               With --test, show the state in game controller terms (a/b/x/y, leftx...)")
+    print("  --gamecontrollerdb FILE")
+    print("                         SDL mapping database (default: ./gamecontrollerdb.txt)")
     print("  -e, --event JOYNUM     Display the events that are received from the joystick")
+    print("  --capture FILE         With --event, also record the events to a columnar capture FILE")
+    print("  --compress             Compress the capture chunks with zlib")
+    print("  --analyze FILE         Print statistics over a capture FILE (requires numpy)")
+    print("  --rate-interval SEC    Bucket size of the --analyze event rate (default: 60)")
     print("  -r, --rumble JOYNUM    Test rumble effects on gamepad JOYNUM (requires evdev)")
     print("  -f, --forcefeedback JOYNUM")
     print("                         Test advanced force feedback effects on wheel JOYNUM")
+    print("  --haptic-play FILE     Stream the rumble pattern FILE to the joystick selected with -j")
+    print("  --haptic-rate HZ       Override the sample rate of the haptic pattern")
+    print("  -j, --joystick JOYNUM  Joystick used by modes taking a file (default: 0)")
+    print("  --forward HOST:PORT    Send the events of the joystick selected with -j as UDP datagrams")
+    print("  --receive [HOST:]PORT  Receive --forward datagrams and replay them on a virtual joystick")
+    print("  --batch-ms MS          Batch window of --forward (default: 2)")
+    print("  --snapshot-ms MS       Full state snapshot interval of --forward (default: 50)")
+    print("  -c, --crosscheck JOYNUM")
+    print("                         Measure SDL event delay against evdev kernel timestamps")
+    print("  --tolerance VALUE      Axis value difference still matched by --crosscheck (default: 1024)")
+    print("  -s, --soak JOYNUM      Long-running soak test writing periodic rollups in bounded memory")
+    print("  --duration SEC         Length of the soak test (default: until Ctrl-c)")
+    print("  --rollup-interval SEC  Interval between soak rollups (default: 60)")
+    print("  --soak-output FILE     JSON lines file receiving the rollups (default: soak.jsonl)")
+    print("  --ff-caps              Survey force feedback effects of all input devices (ioctl only)")
+    print("  --refresh-cache        With --ff-caps, probe devices even if they are cached")
+    print("  --bench-render         Benchmark the --test and --event formatting")
+    print("  -b, --bounce JOYNUM    Detect button bounce, chatter and phantom presses (requires evdev)")
+    print("  --bounce-window MS     Transitions closer than MS are a bounce (default: 5)")
+    print("  --chatter-ms MS        Presses shorter than MS are spurious (default: 20)")
     print()
     print("Dependencies for rumble/force feedback support:")
     print("  pip install evdev")
@@ -889,9 +3244,36 @@ def main():
     parser.add_argument('--version', action='store_true', help='Print version number and exit')
     parser.add_argument('-l', '--list', action='store_true', help='List available joysticks')
     parser.add_argument('-t', '--test', type=int, metavar='JOYNUM', help='Test joystick JOYNUM')
+    parser.add_argument('--idle', action='store_true', help='Wake --test/--event loops only on input')
+    parser.add_argument('--history', action='store_true', help='Show axis history in --test')
+    parser.add_argument('--mapped', action='store_true', help='Show --test in game controller terms')
+    parser.add_argument('--gamecontrollerdb', metavar='FILE', help='SDL game controller mapping database')
     parser.add_argument('-e', '--event', type=int, metavar='JOYNUM', help='Show events from joystick JOYNUM')
+    parser.add_argument('--capture', metavar='FILE', help='Record --event output to a capture FILE')
+    parser.add_argument('--compress', action='store_true', help='Compress capture chunks')
+    parser.add_argument('--analyze', metavar='FILE', help='Analyze a capture FILE')
+    parser.add_argument('--rate-interval', type=float, default=60.0, metavar='SEC', help='Event rate bucket size in seconds')
     parser.add_argument('-r', '--rumble', type=int, metavar='JOYNUM', help='Test rumble on joystick JOYNUM')
     parser.add_argument('-f', '--forcefeedback', type=int, metavar='JOYNUM', help='Test force feedback effects on joystick JOYNUM')
+    parser.add_argument('--haptic-play', metavar='FILE', help='Play a haptic pattern FILE')
+    parser.add_argument('--haptic-rate', type=float, metavar='HZ', help='Haptic pattern sample rate')
+    parser.add_argument('-j', '--joystick', type=int, default=0, metavar='JOYNUM', help='Joystick for modes taking a file')
+    parser.add_argument('--forward', metavar='HOST:PORT', help='Forward joystick events over UDP')
+    parser.add_argument('--receive', metavar='[HOST:]PORT', help='Receive forwarded joystick events')
+    parser.add_argument('--batch-ms', type=float, default=2.0, metavar='MS', help='Forward batch window')
+    parser.add_argument('--snapshot-ms', type=float, default=50.0, metavar='MS', help='Forward snapshot interval')
+    parser.add_argument('-c', '--crosscheck', type=int, metavar='JOYNUM', help='Cross-check SDL against evdev on joystick JOYNUM')
+    parser.add_argument('--tolerance', type=int, default=1024, metavar='VALUE', help='Cross-check axis tolerance')
+    parser.add_argument('-s', '--soak', type=int, metavar='JOYNUM', help='Soak test joystick JOYNUM')
+    parser.add_argument('--duration', type=float, metavar='SEC', help='Soak test duration in seconds')
+    parser.add_argument('--rollup-interval', type=float, default=60.0, metavar='SEC', help='Soak rollup interval')
+    parser.add_argument('--soak-output', default='soak.jsonl', metavar='FILE', help='Soak rollup file')
+    parser.add_argument('--ff-caps', action='store_true', help='Survey force feedback capabilities')
+    parser.add_argument('--refresh-cache', action='store_true', help='Ignore cached force feedback capabilities')
+    parser.add_argument('--bench-render', action='store_true', help='Benchmark --test and --event formatting')
+    parser.add_argument('-b', '--bounce', type=int, metavar='JOYNUM', help='Detect button bounce on joystick JOYNUM')
+    parser.add_argument('--bounce-window', type=float, default=5.0, metavar='MS', help='Bounce window in milliseconds')
+    parser.add_argument('--chatter-ms', type=float, default=20.0, metavar='MS', help='Shortest genuine press in milliseconds')
     
     if len(sys.argv) == 1:
         print_help(sys.argv[0])
@@ -903,15 +3285,33 @@ def main():
         print(f"sdl2-jstest {VERSION}")
         sys.exit(0)
     elif args.list:
-        list_joysticks()
+        list_joysticks(args.gamecontrollerdb)
     elif args.test is not None:
-        test_joystick(args.test)
+        test_joystick(args.test, args.mapped, args.gamecontrollerdb, args.idle, args.history)
     elif args.event is not None:
-        event_joystick(args.event)
+        event_joystick(args.event, args.capture, args.compress, args.idle, args.gamecontrollerdb)
+    elif args.analyze:
+        analyze_capture(args.analyze, args.rate_interval)
     elif args.rumble is not None:
         test_rumble(args.rumble)
     elif args.forcefeedback is not None:
         test_forcefeedback(args.forcefeedback)
+    elif args.haptic_play:
+        test_haptic_play(args.joystick, args.haptic_play, args.haptic_rate)
+    elif args.forward:
+        forward_joystick(args.joystick, args.forward, args.batch_ms, args.snapshot_ms)
+    elif args.receive:
+        receive_joystick(args.receive)
+    elif args.crosscheck is not None:
+        test_crosscheck(args.crosscheck, args.tolerance)
+    elif args.soak is not None:
+        test_soak(args.soak, args.duration, args.rollup_interval, args.soak_output)
+    elif args.ff_caps:
+        survey_ff_caps(args.refresh_cache)
+    elif args.bench_render:
+        bench_render(20000)
+    elif args.bounce is not None:
+        test_bounce(args.bounce, args.bounce_window, args.chatter_ms)
     else:
         print_help(sys.argv[0])
 
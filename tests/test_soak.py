@@ -0,0 +1,73 @@
+"""Vérifie que l'agrégateur de soak garde une mémoire constante sur un long flux"""
+
+import gc
+import importlib.util
+import pathlib
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pygame")
+
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / "src" / "sdl2-jstest.py"
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location("sdl2_jstest", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+jstest = load_script()
+
+EVENTS = 20_000
+ROLLUP_EVERY = 5_000
+DISCONNECT_EVERY = 3_000
+MEMORY_BOUND = 64 * 1024
+
+
+def feed(aggregator, start: int, count: int):
+    """Flux synthétique : axes au-delà de SOAK_MAX_INDEX, boutons, hats, boucles, déconnexions"""
+    kinds = (jstest.CAPTURE_AXIS, jstest.CAPTURE_AXIS, jstest.CAPTURE_BUTTON, jstest.CAPTURE_HAT)
+    axis_indexes = jstest.SOAK_MAX_INDEX + 44
+    for i in range(start, start + count):
+        kind = kinds[i % len(kinds)]
+        if kind == jstest.CAPTURE_AXIS:
+            aggregator.record_event(kind, i % axis_indexes, (i * 7919) % 65536 - 32768)
+        else:
+            aggregator.record_event(kind, i % 16, i & 1)
+        aggregator.record_loop(9_000 + (i * 31) % 4_000)
+        if i % DISCONNECT_EVERY == 0:
+            aggregator.record_disconnect()
+            aggregator.record_reconnect()
+        if i % ROLLUP_EVERY == ROLLUP_EVERY - 1:
+            aggregator.rollup(connected=True)
+
+
+def test_soak_memory_is_flat():
+    aggregator = jstest.SoakAggregator()
+    tracemalloc.start()
+    try:
+        feed(aggregator, 0, EVENTS)
+        gc.collect()
+        after_n, _ = tracemalloc.get_traced_memory()
+
+        feed(aggregator, EVENTS, 9 * EVENTS)
+        gc.collect()
+        after_10n, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert aggregator.total_events == 10 * EVENTS
+    assert after_10n - after_n < MEMORY_BOUND
+
+
+def test_soak_rollup_ignores_out_of_range_axes():
+    aggregator = jstest.SoakAggregator()
+    feed(aggregator, 0, ROLLUP_EVERY - 1)
+    record = aggregator.rollup(connected=True)
+
+    assert all(int(index) < jstest.SOAK_MAX_INDEX for index in record["axes"])
+    assert record["disconnects"] == record["reconnects"] == 2
+    assert len(record["events_before_disconnect"]) <= jstest.SOAK_RECENT_EVENTS